@@ -0,0 +1,269 @@
+"""Scale benchmarks for the HBX SensorLinx integration.
+
+Drives SensorLinxAPI and SensorLinxDataUpdateCoordinator against the local
+simulator, run in a separate process so only the integration is measured:
+
+    python -m benchmarks.bench --devices 10 100 1000 10000 --json results.json
+
+or against traffic recorded from a real account with the cassette option:
+
+    python -m benchmarks.bench --replay hbx_sensorlinx.<entry>.cassette.jsonl.gz
+
+Needs the Home Assistant core package, as the integration itself does.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr, entity_registry as er  # noqa: E402
+
+from benchmarks.simulator import add_arguments  # noqa: E402
+from custom_components.hbx_sensorlinx.api import SensorLinxAPI  # noqa: E402
+from custom_components.hbx_sensorlinx.cassette import Cassette  # noqa: E402
+from custom_components.hbx_sensorlinx.const import CASSETTE_REPLAY  # noqa: E402
+from custom_components.hbx_sensorlinx.coordinator import (  # noqa: E402
+    SensorLinxDataUpdateCoordinator,
+)
+
+SCALES = (10, 100, 1000, 10000)
+
+SIMULATOR_URL = re.compile(r"at (http://\S+)")
+
+
+async def start_simulator_process(devices: int, args: argparse.Namespace) -> Tuple[asyncio.subprocess.Process, str]:
+    """Start the simulator on a free port and return it and its URL."""
+    command = [
+        sys.executable, "-m", "benchmarks.simulator",
+        "--devices", str(devices), "--port", "0",
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--change-rate", str(args.change_rate),
+        "--throttle-rate", str(args.throttle_rate), "--seed", str(args.seed),
+        "--model-mix", ",".join(f"{model}={weight}" for model, weight in args.model_mix.items()),
+    ]
+    if args.retry_after is not None:
+        command += ["--retry-after", str(args.retry_after)]
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, cwd=Path(__file__).resolve().parents[1]
+    )
+    line = (await asyncio.wait_for(process.stdout.readline(), 120)).decode()
+    match = SIMULATOR_URL.search(line)
+    if match is None:
+        process.kill()
+        raise RuntimeError(f"Simulator did not start: {line!r}")
+    return process, match.group(1)
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Return the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))]
+
+
+def time_requests(api: SensorLinxAPI) -> Tuple[List[float], List[float]]:
+    """Record the latency of every request the client sends, in seconds.
+
+    Returns two lists. The first holds the time each request took as the
+    caller sees it, including the wait for a scheduler slot and any
+    retries. The second holds the in-flight time of every attempt, as
+    ApiMetrics records it, which excludes the slot wait.
+    """
+    latencies: List[float] = []
+    in_flight: List[float] = []
+    send = api._send_request
+    metrics = api.metrics
+    record, record_error = metrics.record, metrics.record_error
+
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await send(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    def recorded(route: str, status: int, elapsed: float, received: int) -> None:
+        in_flight.append(elapsed)
+        record(route, status, elapsed, received)
+
+    def recorded_error(route: str, elapsed: float) -> None:
+        in_flight.append(elapsed)
+        record_error(route, elapsed)
+
+    api._send_request = timed
+    metrics.record, metrics.record_error = recorded, recorded_error
+    return latencies, in_flight
+
+
+async def run_refreshes(
+    hass: HomeAssistant,
+    base_url: str,
+    bulk_poll: bool,
+    refreshes: int,
+    args: argparse.Namespace,
+    cassette: Optional[Cassette] = None,
+) -> Dict[str, Any]:
+    """Refresh a fresh coordinator and return its measurements."""
+    api = SensorLinxAPI(
+        "benchmark", base_url, bulk_poll=bulk_poll, rate_limit=args.rate_limit,
+        max_concurrency=args.concurrency, cassette=cassette,
+    )
+    coordinator = SensorLinxDataUpdateCoordinator(
+        hass, api, timedelta(seconds=60), entry_id=f"bench-{bulk_poll}"
+    )
+    latencies, in_flight = time_requests(api)
+    durations = []
+    requests = []
+    devices = 0
+    try:
+        cpu = time.process_time()
+        for _ in range(refreshes):
+            started = time.perf_counter()
+            await coordinator.async_refresh()
+            durations.append(time.perf_counter() - started)
+            requests.append(coordinator.last_refresh_requests)
+            devices = len(coordinator.data or ())
+        cpu = time.process_time() - cpu
+    finally:
+        await api.close()
+    return {
+        "devices": devices,
+        "refreshes": refreshes,
+        "failed_refreshes": coordinator.refresh_metrics.failures,
+        "requests_per_refresh": statistics.mean(requests),
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 1),
+        "request_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "request_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "request_p999_ms": round(percentile(latencies, 0.999) * 1000, 1),
+        "in_flight_p50_ms": round(percentile(in_flight, 0.5) * 1000, 1),
+        "in_flight_p99_ms": round(percentile(in_flight, 0.99) * 1000, 1),
+        "in_flight_p999_ms": round(percentile(in_flight, 0.999) * 1000, 1),
+        "cpu_ms_per_refresh": round(cpu / refreshes * 1000, 1),
+    }
+
+
+async def peak_memory(
+    hass: HomeAssistant,
+    base_url: str,
+    bulk_poll: bool,
+    args: argparse.Namespace,
+    cassette: Optional[Cassette] = None,
+) -> float:
+    """Return the peak memory in MiB allocated by one refresh.
+
+    Measured in a separate pass, tracing allocations slows everything down.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await run_refreshes(hass, base_url, bulk_poll, 1, args, cassette)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 2)
+
+
+async def benchmark(devices: int, hass: HomeAssistant, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Benchmark both poll modes at one scale."""
+    process, base_url = await start_simulator_process(devices, args)
+    results = []
+    try:
+        for bulk_poll in (True, False):
+            # Per-device polling at the largest scales takes minutes a refresh
+            refreshes = args.refreshes if devices < 10000 or bulk_poll else min(args.refreshes, 3)
+            result = await run_refreshes(hass, base_url, bulk_poll, refreshes, args)
+            result["peak_mib"] = await peak_memory(hass, base_url, bulk_poll, args)
+            results.append({"scale": devices, "mode": "bulk" if bulk_poll else "per-device", **result})
+            print(format_row(results[-1]), flush=True)
+    finally:
+        process.terminate()
+        await process.wait()
+    return results
+
+
+COLUMNS = (
+    ("scale", 7), ("mode", 11), ("devices", 8), ("requests_per_refresh", 9),
+    ("p50_ms", 9), ("p99_ms", 9), ("request_p50_ms", 9), ("request_p99_ms", 9),
+    ("request_p999_ms", 10), ("in_flight_p50_ms", 9), ("in_flight_p99_ms", 9),
+    ("in_flight_p999_ms", 10), ("cpu_ms_per_refresh", 9), ("peak_mib", 9),
+)
+HEADERS = (
+    "scale", "mode", "devices", "requests", "p50 ms", "p99 ms",
+    "req p50", "req p99", "req p999", "fly p50", "fly p99", "fly p999", "cpu ms", "peak MiB",
+)
+
+
+def format_row(result: Dict[str, Any]) -> str:
+    """Return a result as a table row."""
+    return "".join(f"{result[key]!s:>{width}}" for key, width in COLUMNS)
+
+
+async def replay(path: Path, hass: HomeAssistant, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Benchmark the poll mode the cassette was recorded with."""
+    cassette = Cassette(str(path), CASSETTE_REPLAY, speed=args.replay_speed)
+    await cassette.async_load()
+    bulk_poll = args.mode == "bulk"
+    result = await run_refreshes(hass, "http://replay", bulk_poll, args.refreshes, args, cassette)
+    result["peak_mib"] = await peak_memory(hass, "http://replay", bulk_poll, args, cassette)
+    results = [{"scale": "replay", "mode": args.mode, **result}]
+    print(format_row(results[-1]), flush=True)
+    if cassette.stats["not_recorded"]:
+        print(f"{cassette.stats['not_recorded']} requests had no recording, check --mode")
+    return results
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the benchmarks."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await dr.async_load(hass)
+        await er.async_load(hass)
+        print("".join(f"{header:>{width}}" for header, (_, width) in zip(HEADERS, COLUMNS)))
+        results = []
+        try:
+            if args.replay:
+                results.extend(await replay(args.replay, hass, args))
+            else:
+                for devices in args.devices:
+                    results.extend(await benchmark(devices, hass, args))
+        finally:
+            await hass.async_stop(force=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--refreshes", type=int, default=10, help="refreshes measured per scale and mode")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="client request rate limit, unlimited by default")
+    parser.add_argument("--concurrency", type=int, default=8, help="client concurrent requests")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--replay", type=Path, help="replay this cassette instead of simulating")
+    parser.add_argument("--replay-speed", type=float, default=0.0,
+                        help="replay latency divisor, 1 keeps the recorded latency, 0 none")
+    parser.add_argument("--mode", choices=("bulk", "per-device"), default="bulk",
+                        help="poll mode of the replayed cassette")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
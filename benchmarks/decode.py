@@ -0,0 +1,137 @@
+"""Response decoding benchmark for the HBX SensorLinx integration.
+
+Decodes unsampled history pages generated by the simulator with each
+strategy and reports the total time, the longest the event loop was
+blocked and the peak memory:
+
+    python -m benchmarks.decode --records 1000 5000 10000 20000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.simulator import SimulatedAccount, paginate  # noqa: E402
+from custom_components.hbx_sensorlinx.decoder import BodyDecoder, fast_loads  # noqa: E402
+
+DEFAULT_RECORDS = (1000, 5000, 10000, 20000)
+
+
+class FakeRequest:
+    """The query of a request, all paginate() reads."""
+
+    def __init__(self, limit: int):
+        """Initialize the request."""
+        self.query = {"limit": str(limit), "page": "1"}
+
+
+def history_page(records: int) -> bytes:
+    """Return an unsampled history page of a snow melt controller."""
+    account = SimulatedAccount(1, {"SNO": 1})
+    sync_code = account.sync_codes[0]
+    start = 1700000000
+    items = account.history(sync_code, start, start + records * 60, None)
+    return json.dumps(paginate(items, FakeRequest(records))).encode("utf-8")
+
+
+def strategies() -> Dict[str, Callable[[bytes], Awaitable[Any]]]:
+    """Return the decoding strategies by name."""
+    inline = BodyDecoder(incremental_size=sys.maxsize)
+    incremental = BodyDecoder(incremental_size=0)
+
+    async def stdlib(body: bytes) -> Any:
+        return json.loads(body)
+
+    async def executor(body: bytes) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, fast_loads, body)
+
+    return {
+        "json": stdlib,
+        "fast": inline.decode,
+        "executor": executor,
+        "incremental": incremental.decode,
+        "default": BodyDecoder().decode,
+    }
+
+
+async def _ticker(gaps: List[float], stop: asyncio.Event) -> None:
+    """Record how long each turn of the event loop took."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def measure(decode: Callable[[bytes], Awaitable[Any]], body: bytes, expected: Any) -> Tuple[float, float, float]:
+    """Return the time and the longest loop block in ms, and the peak MiB."""
+    gaps: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(gaps, stop))
+    await asyncio.sleep(0.01)
+    gaps.clear()
+    started = time.perf_counter()
+    value = await decode(body)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    if value != expected:
+        raise AssertionError("Decoded body differs")
+    del value
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await decode(body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed * 1000, max(gaps, default=0.0) * 1000, peak / 2**20
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the benchmark."""
+    results = []
+    print(f"{'records':>8}{'MiB':>7}{'strategy':>13}{'total ms':>10}{'block ms':>10}{'peak MiB':>10}")
+    for records in args.records:
+        body = history_page(records)
+        expected = json.loads(body)
+        for name, decode in strategies().items():
+            runs = [await measure(decode, body, expected) for _ in range(args.repeat)]
+            total, block, peak = (min(run[column] for run in runs) for column in range(3))
+            result = {
+                "records": records,
+                "mib": round(len(body) / 2**20, 2),
+                "strategy": name,
+                "total_ms": round(total, 1),
+                "block_ms": round(block, 1),
+                "peak_mib": round(peak, 1),
+            }
+            results.append(result)
+            print("".join(f"{value!s:>{width}}" for value, width in zip(result.values(), (8, 7, 13, 10, 10, 10))))
+    return results
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=list(DEFAULT_RECORDS))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per strategy, the best is reported")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
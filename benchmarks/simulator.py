@@ -0,0 +1,380 @@
+"""Local SensorLinx Connect API simulator.
+
+Serves the endpoints the integration uses with device payloads generated
+from the model schemas in sensorlinx-connect-api.json, so the integration
+can be exercised at any scale without a live account.
+
+    python -m benchmarks.simulator --devices 1000 --latency 0.05 --port 8080
+
+Point the integration (or SensorLinxAPI) at http://127.0.0.1:8080 with any
+API key.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+SPEC_FILE = (
+    Path(__file__).resolve().parents[1]
+    / "custom_components"
+    / "hbx_sensorlinx"
+    / "sensorlinx-connect-api.json"
+)
+
+DEFAULT_MODEL_MIX = {"THM": 0.5, "ZON": 0.2, "FLW": 0.1, "ENG": 0.1, "SNO": 0.1}
+
+# The history endpoint rejects longer ranges
+MAX_HISTORY_WINDOW = 30 * 24 * 3600
+
+# Keys reported by the accumulated endpoint of each model
+ACCUMULATED_KEYS = {
+    "BTU": ("btuAll",),
+    "ENG": ("lifetimeHeating", "lifetimeCooling"),
+    "FLO": ("lifetimeVolume",),
+    "FLW": ("totalVolume",),
+}
+
+
+def load_model_schemas(spec_file: Path = SPEC_FILE) -> Dict[str, Dict[str, Any]]:
+    """Return the schema properties of each model keyed by model prefix."""
+    spec = json.loads(spec_file.read_text(encoding="utf-8"))
+    models = {}
+    for name, schema in spec["components"]["schemas"].items():
+        prefix, _, version = name.partition("-")
+        if version:
+            models[prefix] = schema.get("properties", {})
+    return models
+
+
+def _sample_value(prop: Dict[str, Any], rng: random.Random) -> Any:
+    """Return a plausible value for a schema property."""
+    kind = prop.get("type")
+    if kind in ("number", "integer"):
+        low = prop.get("minimum", 0)
+        high = prop.get("maximum", max(low, 0) + 100)
+        if kind == "integer" or (low == 0 and high == 1):
+            return rng.randint(int(low), int(high))
+        return round(rng.uniform(low, high), 1)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "string":
+        return (prop.get("examples") or ["sim"])[0]
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {}
+    return None
+
+
+class SimulatedAccount:
+    """Devices of one simulated account.
+
+    Numeric readings drift a little each time a device is read, so a
+    refresh sees a realistic share of changed values.
+    """
+
+    def __init__(
+        self,
+        devices: int,
+        model_mix: Optional[Dict[str, float]] = None,
+        change_rate: float = 0.3,
+        disconnected: float = 0.02,
+        seed: int = 0,
+    ):
+        """Generate the devices."""
+        self.rng = random.Random(seed)
+        self.schemas = load_model_schemas()
+        self.change_rate = change_rate
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.accumulated_rate: Dict[str, float] = {}
+
+        mix = model_mix or DEFAULT_MODEL_MIX
+        models = list(mix)
+        weights = [mix[model] for model in models]
+        for index in range(devices):
+            model = self.rng.choices(models, weights)[0]
+            sync_code = f"A{model}-{index:05d}"
+            payload = {
+                "syncCode": sync_code,
+                "name": f"{model} {index}",
+                "deviceType": model,
+                "firmVer": 1.22,
+                "connectedAt": "2024-04-16T21:36:29.664Z",
+                "connected": self.rng.random() >= disconnected,
+            }
+            for key, prop in self.schemas.get(model, {}).items():
+                payload[key] = _sample_value(prop, self.rng)
+            self.devices[sync_code] = payload
+            self.accumulated_rate[sync_code] = self.rng.uniform(1, 100)
+        self.sync_codes = list(self.devices)
+
+    def read(self, sync_code: str) -> Dict[str, Any]:
+        """Return a device payload, drifting one reading now and then."""
+        payload = self.devices[sync_code]
+        if self.rng.random() < self.change_rate:
+            numeric = [
+                key
+                for key, prop in self.schemas.get(payload["deviceType"], {}).items()
+                if prop.get("type") == "number" and prop.get("maximum") != 1
+            ]
+            if numeric:
+                key = self.rng.choice(numeric)
+                payload[key] = round((payload.get(key) or 0) + self.rng.uniform(-0.5, 0.5), 1)
+        return payload
+
+    def brief(self, sync_code: str) -> Dict[str, Any]:
+        """Return the DeviceBrief of a device."""
+        payload = self.devices[sync_code]
+        return {
+            "syncCode": sync_code,
+            "deviceType": payload["deviceType"],
+            "firmVer": payload["firmVer"],
+            "connectedAt": payload["connectedAt"],
+        }
+
+    def history(self, sync_code: str, start: int, end: int, sample: Optional[int]) -> List[Dict[str, Any]]:
+        """Return one record per minute, or sample evenly spaced records."""
+        payload = self.devices[sync_code]
+        step = 60
+        if sample:
+            step = max(step, math.ceil((end - start) / sample))
+        keys = [key for key, value in payload.items() if isinstance(value, float)]
+        return [
+            {"timestamp": timestamp, **{key: payload[key] for key in keys}}
+            for timestamp in range(start - start % step + step if start % step else start, end, step)
+        ]
+
+    def accumulated(self, sync_code: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Return one accumulated interval per minute."""
+        keys = ACCUMULATED_KEYS.get(self.devices[sync_code]["deviceType"], ())
+        rate = self.accumulated_rate[sync_code]
+        return [
+            {"timestamp": timestamp, **{key: rate for key in keys}}
+            for timestamp in range(start, end, 60)
+        ]
+
+
+def paginate(items: List[Any], request: web.Request, default_limit: int = 25) -> Dict[str, Any]:
+    """Return a PaginatedResource page of items."""
+    limit = max(1, int(request.query.get("limit", default_limit)))
+    page = max(1, int(request.query.get("page", 1)))
+    total_pages = max(1, math.ceil(len(items) / limit))
+    offset = (page - 1) * limit
+    return {
+        "items": items[offset:offset + limit],
+        "totalItems": len(items),
+        "totalPages": total_pages,
+        "offset": offset,
+        "limit": limit,
+        "page": page,
+        "pagingCounter": offset + 1,
+        "hasPrevPage": page > 1,
+        "hasNextPage": page < total_pages,
+        "nextPage": page + 1 if page < total_pages else None,
+        "prevPage": page - 1 if page > 1 else None,
+    }
+
+
+class Simulator:
+    """aiohttp application serving a SimulatedAccount."""
+
+    def __init__(
+        self,
+        account: SimulatedAccount,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        throttle_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+    ):
+        """Initialize the simulator.
+
+        Every response is delayed by latency plus a uniform random jitter
+        in seconds; error_rate of the requests fail with a 503 and
+        throttle_rate with a 429. Both carry a Retry-After header of
+        retry_after seconds when it is set.
+        """
+        self.account = account
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.add_routes(
+            [
+                web.get("/v1/devices/available", self.available),
+                web.get("/v1/devices", self.devices),
+                web.get("/v1/devices/model/{model}", self.model),
+                web.get("/v1/devices/{sync_code}", self.device),
+                web.patch("/v1/devices/{sync_code}", self.update),
+                web.get("/v1/devices/{sync_code}/history/accumulated/{start}/{end}", self.accumulated),
+                web.get("/v1/devices/{sync_code}/history/{start}/{end}", self.history),
+            ]
+        )
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count requests and apply latency, errors and authentication."""
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "?"
+        self.requests[route] = self.requests.get(route, 0) + 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if not request.headers.get("X-API-KEY"):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after is not None else None
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return web.json_response({"message": "Service Unavailable"}, status=503, headers=headers)
+        if self.throttle_rate and self.rng.random() < self.throttle_rate:
+            return web.json_response({"message": "Too Many Requests"}, status=429, headers=headers)
+        return await handler(request)
+
+    @property
+    def total_requests(self) -> int:
+        """Return the number of requests served."""
+        return sum(self.requests.values())
+
+    def _device(self, request: web.Request) -> str:
+        """Return the syncCode of the request or raise 404."""
+        sync_code = request.match_info["sync_code"]
+        if sync_code not in self.account.devices:
+            raise web.HTTPNotFound(text=json.dumps({"message": "Device not found"}))
+        return sync_code
+
+    @staticmethod
+    def _range(request: web.Request) -> Tuple[int, int]:
+        """Return the validated start and end of a history request."""
+        start, end = int(request.match_info["start"]), int(request.match_info["end"])
+        if end <= start or end - start > MAX_HISTORY_WINDOW:
+            raise web.HTTPBadRequest(text=json.dumps({"message": "Invalid range"}))
+        return start, end
+
+    async def available(self, request: web.Request) -> web.Response:
+        """GET /devices/available."""
+        account = self.account
+        return web.json_response(paginate([account.brief(code) for code in account.sync_codes], request))
+
+    async def devices(self, request: web.Request) -> web.Response:
+        """GET /devices."""
+        page = paginate(self.account.sync_codes, request)
+        page["items"] = [self.account.read(code) for code in page["items"]]
+        return web.json_response(page)
+
+    async def model(self, request: web.Request) -> web.Response:
+        """GET /devices/model/{model}."""
+        model = request.match_info["model"]
+        codes = [code for code, payload in self.account.devices.items() if payload["deviceType"] == model]
+        page = paginate(codes, request)
+        page["items"] = [self.account.read(code) for code in page["items"]]
+        return web.json_response(page)
+
+    async def device(self, request: web.Request) -> web.Response:
+        """GET /devices/{syncCode}."""
+        return web.json_response(self.account.read(self._device(request)))
+
+    async def update(self, request: web.Request) -> web.Response:
+        """PATCH /devices/{syncCode}."""
+        sync_code = self._device(request)
+        changes = await request.json()
+        if not isinstance(changes, dict):
+            raise web.HTTPBadRequest(text=json.dumps({"message": "Expected an object"}))
+        self.account.devices[sync_code].update(changes)
+        return web.json_response(self.account.devices[sync_code])
+
+    async def history(self, request: web.Request) -> web.Response:
+        """GET /devices/{syncCode}/history/{start}/{end}."""
+        sync_code = self._device(request)
+        start, end = self._range(request)
+        sample = request.query.get("sample")
+        records = self.account.history(sync_code, start, end, int(sample) if sample else None)
+        return web.json_response(paginate(records, request, default_limit=1000))
+
+    async def accumulated(self, request: web.Request) -> web.Response:
+        """GET /devices/{syncCode}/history/accumulated/{start}/{end}."""
+        sync_code = self._device(request)
+        start, end = self._range(request)
+        return web.json_response({"items": self.account.accumulated(sync_code, start, end)})
+
+
+async def start_simulator(
+    simulator: Simulator, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[web.AppRunner, str]:
+    """Start serving and return the runner and the base URL."""
+    runner = web.AppRunner(simulator.app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def parse_model_mix(value: str) -> Dict[str, float]:
+    """Parse a model mix like THM=0.5,ZON=0.5."""
+    mix = {}
+    for part in value.split(","):
+        model, _, weight = part.partition("=")
+        mix[model.strip()] = float(weight or 1)
+    return mix
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the simulator options to a parser."""
+    parser.add_argument("--model-mix", type=parse_model_mix, default=DEFAULT_MODEL_MIX,
+                        help="model weights, e.g. THM=0.5,ZON=0.5")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with 503 and 429 answers")
+    parser.add_argument("--change-rate", type=float, default=0.3, help="share of reads that change a value")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Serve until interrupted."""
+    account = SimulatedAccount(args.devices, args.model_mix, args.change_rate, seed=args.seed)
+    simulator = Simulator(
+        account,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        seed=args.seed,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+    )
+    runner, base_url = await start_simulator(simulator, args.host, args.port)
+    print(f"Simulating {args.devices} devices at {base_url}", flush=True)
+    started = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        print(f"Served {simulator.total_requests} requests in {time.monotonic() - started:.0f}s")
+        await runner.cleanup()
+
+
+def main() -> None:
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,77 @@
 """The HBX SensorLinx integration."""
 import logging
+import os
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, CONF_URL, CONF_SCAN_INTERVAL, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
 
 from .api import SensorLinxAPI
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, DEFAULT_URL
-from .sensor import SensorLinxDataUpdateCoordinator
+from .cassette import Cassette
+from .resilience import CircuitBreaker, RetryPolicy
+from .const import (
+    DOMAIN,
+    ACCUMULATED_STORAGE_KEY,
+    ACCUMULATED_STORAGE_VERSION,
+    BULK_PAGE_SIZE,
+    CASSETTE_FILE,
+    CASSETTE_FLUSH_SIZE,
+    CASSETTE_MAX_BYTES,
+    CASSETTE_OFF,
+    CONF_BREAKER_RESET,
+    CONF_BREAKER_THRESHOLD,
+    CONF_BULK_POLL,
+    CONF_CACHE_TTL,
+    CONF_CASSETTE_MODE,
+    CONF_CONNECT_TIMEOUT,
+    CONF_DEGREE_BASE,
+    CONF_DERIVED_METRICS,
+    CONF_DERIVED_SEED,
+    CONF_DERIVED_WINDOW,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MAX_RETRIES,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_REPLAY_SPEED,
+    CONF_TEMPERATURE_DEADBAND,
+    DEADBAND_SENSORS,
+    DEFAULT_BREAKER_RESET,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_BULK_POLL,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CASSETTE_MODE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_DEGREE_BASE,
+    DEFAULT_DERIVED_METRICS,
+    DEFAULT_DERIVED_SEED,
+    DEFAULT_DERIVED_WINDOW,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_REPLAY_SPEED,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DEFAULT_URL,
+    PAGE_CONCURRENCY,
+    RESPONSE_CACHE_SIZE,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .control import DeviceWriter
+from .coordinator import SensorLinxAccumulatedCoordinator, SensorLinxDataUpdateCoordinator
+from .derived import DerivedMetrics
+from .history import HistoryBackfill
+from .services import async_setup_services
+from .session import async_get_session_pool
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,36 +82,121 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up HBX SensorLinx from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
-    api_key = entry.data[CONF_API_KEY]
-    base_url = entry.data.get(CONF_URL, DEFAULT_URL)
-    scan_interval = entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    # Options override the values entered during the initial config flow
+    config = {**entry.data, **entry.options}
     
-    api = SensorLinxAPI(api_key, base_url)
+    api_key = config[CONF_API_KEY]
+    base_url = config.get(CONF_URL, DEFAULT_URL)
+    scan_interval = config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     
-    # Test the API connection
-    try:
-        devices = await api.get_available_devices()
-        if not devices:
-            raise ConfigEntryNotReady("Unable to connect to SensorLinx API")
-    except Exception as err:
-        _LOGGER.error("Error connecting to SensorLinx API: %s", err)
-        raise ConfigEntryNotReady(f"Error connecting to SensorLinx API: {err}")
+    # Record the API traffic, or serve it from an earlier recording
+    cassette = None
+    cassette_mode = config.get(CONF_CASSETTE_MODE, DEFAULT_CASSETTE_MODE)
+    if cassette_mode != CASSETTE_OFF:
+        cassette = Cassette(
+            hass.config.path(STORAGE_DIR, CASSETTE_FILE.format(entry.entry_id)),
+            cassette_mode,
+            speed=config.get(CONF_REPLAY_SPEED, DEFAULT_REPLAY_SPEED),
+            flush_size=CASSETTE_FLUSH_SIZE,
+            max_bytes=CASSETTE_MAX_BYTES,
+        )
+        if cassette.replaying:
+            try:
+                await cassette.async_load()
+            except (OSError, ValueError, KeyError) as err:
+                raise ConfigEntryNotReady(f"Cannot read cassette {cassette.path}: {err}") from err
+        _LOGGER.warning(
+            "%s API traffic with cassette %s",
+            "Replaying" if cassette.replaying else "Recording", cassette.path,
+        )
+    
+    pool = async_get_session_pool(hass)
+    api = SensorLinxAPI(
+        api_key,
+        base_url,
+        bulk_poll=config.get(CONF_BULK_POLL, DEFAULT_BULK_POLL),
+        bulk_page_size=BULK_PAGE_SIZE,
+        page_concurrency=PAGE_CONCURRENCY,
+        max_concurrency=config.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+        rate_limit=config.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        connect_timeout=config.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+        read_timeout=config.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        retry_policy=RetryPolicy(max_retries=config.get(CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES)),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=config.get(CONF_BREAKER_THRESHOLD, DEFAULT_BREAKER_THRESHOLD),
+            reset_timeout=config.get(CONF_BREAKER_RESET, DEFAULT_BREAKER_RESET),
+        ),
+        cache_ttl=config.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+        cache_size=RESPONSE_CACHE_SIZE,
+        session=pool.acquire(base_url),
+        cassette=cassette,
+    )
+    
+    deadband = config.get(CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND)
     
     # Create data update coordinator
     coordinator = SensorLinxDataUpdateCoordinator(
         hass,
         api,
         timedelta(seconds=scan_interval),
+        entry.entry_id,
+        deadbands={key: deadband for key in DEADBAND_SENSORS} if deadband else None,
+        max_poll_interval=config.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL),
+        max_staleness=config.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS),
+    )
+    
+    if config.get(CONF_DERIVED_METRICS, DEFAULT_DERIVED_METRICS):
+        coordinator.derived = DerivedMetrics(
+            config.get(CONF_DERIVED_WINDOW, DEFAULT_DERIVED_WINDOW) * 60,
+            config.get(CONF_DEGREE_BASE, DEFAULT_DEGREE_BASE),
+            sample_interval=scan_interval,
+        )
+    
+    if await coordinator.async_load_snapshot():
+        # Build entities from the last snapshot and refresh in the background
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry.entry_id}"
+        )
+    else:
+        # First start, nothing to restore so wait for the cloud
+        try:
+            await coordinator.async_config_entry_first_refresh()
+            if not coordinator.data:
+                raise ConfigEntryNotReady("No devices returned from SensorLinx API")
+        except ConfigEntryNotReady:
+            await pool.release(base_url)
+            raise
+    
+    # Energy/volume totals update on their own, slower, schedule
+    coordinator.accumulated = SensorLinxAccumulatedCoordinator(hass, coordinator, entry.entry_id)
+    entry.async_create_background_task(
+        hass, coordinator.accumulated.async_refresh(), f"{DOMAIN}_accumulated_{entry.entry_id}"
     )
     
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    coordinator.writer = DeviceWriter(hass, coordinator)
+    
+    if coordinator.derived is not None and config.get(CONF_DERIVED_SEED, DEFAULT_DERIVED_SEED):
+        # Fill the rolling windows from history instead of waiting them out
+        entry.async_create_background_task(
+            hass,
+            coordinator.derived.async_seed(
+                HistoryBackfill(api),
+                {device_id: device.device_type for device_id, device in coordinator.data.items()},
+                dt_util.utcnow().timestamp(),
+            ),
+            f"{DOMAIN}_derived_seed_{entry.entry_id}",
+        )
     
     hass.data[DOMAIN][entry.entry_id] = coordinator
     
+    # Reload when options change
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    
     # Setup platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    await async_setup_services(hass)
+    
     return True
 
 
@@ -57,12 +204,29 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.writer.async_shutdown()
+        # Leaves the shared session open, writes what a cassette buffered
         await coordinator.api.close()
+        await async_get_session_pool(hass).release(coordinator.api.base_url)
     
     return unload_ok
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted data of a deleted config entry."""
+    for version, key in (
+        (SNAPSHOT_STORAGE_VERSION, SNAPSHOT_STORAGE_KEY),
+        (ACCUMULATED_STORAGE_VERSION, ACCUMULATED_STORAGE_KEY),
+    ):
+        await Store(hass, version, key.format(entry.entry_id)).async_remove()
+
+    cassette_path = hass.config.path(STORAGE_DIR, CASSETTE_FILE.format(entry.entry_id))
+    try:
+        await hass.async_add_executor_job(os.remove, cassette_path)
+    except FileNotFoundError:
+        pass
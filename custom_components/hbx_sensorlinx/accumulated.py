@@ -0,0 +1,83 @@
+"""Running totals from the accumulated history endpoint."""
+import logging
+import math
+from typing import Any, Dict, Iterable, Optional
+
+from .api import SensorLinxAPI
+from .history import split_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def sum_accumulated(response: Dict[str, Any], keys: Iterable[str]) -> Optional[Dict[str, float]]:
+    """Return the per-key sum of the intervals in an accumulated response."""
+    items = response.get("items")
+    if items is None:
+        return None
+
+    totals = {}
+    for key in keys:
+        values = []
+        for item in items:
+            value = item.get(key)
+            if value is None:
+                continue
+            try:
+                values.append(float(value))
+            except (TypeError, ValueError):
+                continue
+        totals[key] = math.fsum(values)
+    return totals
+
+
+class AccumulatedTotals:
+    """Per-device running totals with an incremental cursor.
+
+    Each update only requests the interval since the device's cursor and
+    adds the result to its totals. State is a plain dict so it can be
+    persisted as is: {syncCode: {"cursor": ts, "totals": {key: value}}}.
+    """
+
+    def __init__(self, state: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Initialize from persisted state."""
+        self.state = state or {}
+
+    def totals(self, sync_code: str) -> Dict[str, float]:
+        """Return the totals of a device."""
+        return self.state.get(sync_code, {}).get("totals", {})
+
+    async def async_update(self, api: SensorLinxAPI, sync_code: str, keys: Iterable[str], now: int) -> bool:
+        """Add the data accumulated since the cursor to the totals.
+
+        The first update of a device only sets its cursor, totals count
+        from then on. Returns True if the totals or cursor moved.
+        """
+        keys = list(keys)
+        # Whole minutes only, the endpoint reports one minute intervals
+        end = now - now % 60
+        device = self.state.get(sync_code)
+        if device is None:
+            self.state[sync_code] = {"cursor": end, "totals": {key: 0.0 for key in keys}}
+            return True
+
+        cursor = device["cursor"]
+        if end <= cursor:
+            return False
+
+        updated = False
+        for window_start, window_end in split_windows(cursor, end):
+            response = await api.get_device_accumulated(sync_code, window_start, window_end)
+            if not response:
+                _LOGGER.debug("No accumulated data for %s, retrying next update", sync_code)
+                break
+            delta = sum_accumulated(response, keys)
+            if delta is None:
+                break
+
+            totals = device["totals"]
+            for key, value in delta.items():
+                totals[key] = totals.get(key, 0.0) + value
+            device["cursor"] = window_end
+            updated = True
+
+        return updated
@@ -2,103 +2,583 @@
 import logging
 import aiohttp
 import asyncio
-from typing import Dict, List, Optional, Any
+import math
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 
+from .cache import ResponseCache, SingleFlight, request_key
+from .cassette import Cassette
+from .const import POOL_DNS_CACHE_TTL, POOL_KEEPALIVE_TIMEOUT, POOL_LIMIT_PER_HOST
+from .decoder import BodyDecoder
+from .descriptors import SensorDescriptor, get_descriptors
+from .metrics import ApiMetrics, endpoint_route
+from .resilience import STATE_HALF_OPEN, CircuitBreaker, RetryPolicy, parse_retry_after
+from .scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONTROL,
+    PRIORITY_POLL,
+    RequestScheduler,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
+# Methods that may be retried after a network error or 5xx response
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+try:  # Brotli decoding needs the optional brotli package
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Metrics routes of the endpoints with ids, see endpoint_route()
+ROUTE_DEVICE = "/v1/devices/{}"
+ROUTE_HISTORY = "/v1/devices/{}/history/{}/{}"
+ROUTE_ACCUMULATED = "/v1/devices/{}/history/accumulated/{}/{}"
+
+# Headers common to every account, the API key is sent per request
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Content-Type": "application/json",
+}
+
+
+class IncompletePagesError(Exception):
+    """A page of a paginated endpoint could not be fetched."""
+
+
+def create_session(limit_per_host: int = POOL_LIMIT_PER_HOST) -> aiohttp.ClientSession:
+    """Create a session tuned for many small requests to one host.
+
+    Connections are kept alive between polls and DNS answers are cached,
+    so a poll normally reuses warm TLS connections.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=POOL_DNS_CACHE_TTL,
+        keepalive_timeout=POOL_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+
+
+def model_endpoint(model: str) -> str:
+    """Return the endpoint listing the devices of a model."""
+    return f"/v1/devices/model/{model}"
+
+
+def history_endpoint(device_id: str, start: int, end: int) -> str:
+    """Return the history endpoint of a device for a time range."""
+    return f"/v1/devices/{device_id}/history/{int(start)}/{int(end)}"
+
+
 class SensorLinxAPI:
     """API client for SensorLinx devices."""
     
-    def __init__(self, api_key: str, base_url: str = "https://connect.sensorlinx.co"):
-        """Initialize the API client."""
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://connect.sensorlinx.co",
+        bulk_poll: bool = True,
+        bulk_page_size: int = 100,
+        page_concurrency: int = 20,
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = 20.0,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 30.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        cache_ttl: float = 0.0,
+        cache_size: int = 256,
+        session: Optional[aiohttp.ClientSession] = None,
+        cassette: Optional[Cassette] = None,
+    ):
+        """Initialize the API client.
+        
+        Concurrent identical GETs always share one request; cache_ttl also
+        keeps GET responses for that many seconds. A session passed in is
+        shared and left open by close(), otherwise the client creates and
+        owns one. A cassette records every response, or answers every
+        request from its recordings without touching the network.
+        """
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
-        self.session = None
+        self.bulk_poll = bulk_poll
+        self.bulk_page_size = bulk_page_size
+        self.page_concurrency = page_concurrency
+        self.scheduler = RequestScheduler(max_concurrency, rate_limit)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.single_flight = SingleFlight(ResponseCache(cache_ttl, cache_size))
+        self.metrics = ApiMetrics()
+        self.decoder = BodyDecoder()
+        self.session = session
+        self._owns_session = session is None
+        self.cassette = cassette
         
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "X-API-KEY": self.api_key,
-                    "Accept": "application/json",
-                    "Content-Type": "application/json"
-                }
-            )
+        if self.session is None or (self._owns_session and self.session.closed):
+            self.session = create_session()
+            self._owns_session = True
         return self.session
         
-    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """Make HTTP request to the API."""
-        session = await self._get_session()
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        priority: Optional[int] = None,
+        route: Optional[str] = None,
+        **kwargs,
+    ) -> Optional[Dict[str, Any]]:
+        """Make HTTP request to the API.
+        
+        Concurrent GETs with the same URL and params share one request and
+        its response, which callers must not mutate. Any other method
+        clears the response cache since it may change what GETs return.
+        
+        route labels the request in the metrics and defaults to the
+        endpoint, so callers of an endpoint with ids pass its template.
+        """
+        if method != "GET":
+            self.single_flight.cache.clear()
+            return await self._send_request(method, endpoint, priority, route, **kwargs)
+            
+        key = request_key(method, endpoint, kwargs.get("params"))
+        return await self.single_flight.run(
+            key, lambda: self._send_request(method, endpoint, priority, route, **kwargs)
+        )
+        
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        priority: Optional[int] = None,
+        route: Optional[str] = None,
+        **kwargs,
+    ) -> Optional[Dict[str, Any]]:
+        """Send a request to the API.
+        
+        Every attempt waits for a slot from the shared scheduler. Writes
+        default to control priority and reads to polling priority.
+        
+        Timeouts, network errors and 5xx responses are retried with backoff
+        for idempotent methods; 429 responses are retried for any method.
+        Retry-After is honored. While the circuit breaker is open requests
+        fail immediately. Returns None on failure.
+        """
+        cassette = self.cassette
+        replaying = cassette is not None and cassette.replaying
+        session = None if replaying else await self._get_session()
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if priority is None:
+            priority = PRIORITY_POLL if method == "GET" else PRIORITY_CONTROL
+        kwargs.setdefault("timeout", self.timeout)
+        # Sessions are shared between accounts, authenticate every request
+        kwargs["headers"] = {**kwargs.get("headers", {}), "X-API-KEY": self.api_key}
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
         
-        try:
-            async with session.request(method, url, **kwargs) as response:
-                if response.status == 200:
-                    return await response.json()
-                elif response.status == 404:
-                    _LOGGER.error(f"Endpoint not found: {url}")
-                    return None
+        route = route or endpoint
+        metrics = self.metrics
+        
+        while True:
+            # A half-open request probes the server, its slot must be freed
+            # when it ends without a verdict
+            probe = self.circuit_breaker.state == STATE_HALF_OPEN
+            if not self.circuit_breaker.allow_request():
+                metrics.rejected += 1
+                _LOGGER.debug("Circuit breaker open, skipping %s %s", method, url)
+                return None
+                
+            retry_after = None
+            metrics.requests += 1
+            if attempt:
+                metrics.retries += 1
+            try:
+                async with self.scheduler.slot(priority):
+                    # Latency excludes the wait for a slot
+                    start = time.monotonic()
+                    try:
+                        if replaying:
+                            status, headers, body = await cassette.replay(
+                                method, endpoint, kwargs.get("params"), kwargs.get("json")
+                            )
+                        else:
+                            async with session.request(method, url, **kwargs) as response:
+                                body = await response.read()
+                            status, headers = response.status, response.headers
+                        elapsed = time.monotonic() - start
+                        metrics.record(route, status, elapsed, len(body))
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        metrics.record_error(route, time.monotonic() - start)
+                        raise
+                        
+                if cassette is not None and not replaying:
+                    cassette.record(method, endpoint, kwargs, status, headers, body, elapsed)
+                        
+                if status == 200:
+                    # The server answered, a body that does not decode is
+                    # no reason to open the breaker
+                    self.circuit_breaker.record_success()
+                    try:
+                        return await self.decoder.decode(body)
+                    except ValueError as e:
+                        _LOGGER.error("Invalid response to %s %s: %s", method, url, e)
+                        return None
+                    
+                if status == 429:
+                    # Throttled, the server itself is healthy
+                    if probe:
+                        self.circuit_breaker.release_probe()
+                    retryable = True
+                    error = "rate limited (429)"
+                elif status >= 500:
+                    self.circuit_breaker.record_failure()
+                    retryable = idempotent
+                    error = f"{status} - {body.decode(errors='replace')}"
                 else:
-                    _LOGGER.error(f"API request failed: {response.status} - {await response.text()}")
+                    self.circuit_breaker.record_success()
+                    if status == 404:
+                        _LOGGER.error("Endpoint not found: %s", url)
+                    else:
+                        _LOGGER.error(
+                            "API request failed: %s - %s", status, body.decode(errors="replace")
+                        )
                     return None
+                retry_after = parse_retry_after(headers.get("Retry-After"))
                     
-        except aiohttp.ClientError as e:
-            _LOGGER.error(f"HTTP client error: {e}")
-            return None
-        except Exception as e:
-            _LOGGER.error(f"Unexpected error: {e}")
-            return None
+            except asyncio.CancelledError:
+                if probe:
+                    self.circuit_breaker.release_probe()
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.circuit_breaker.record_failure()
+                retryable = idempotent
+                error = f"HTTP client error: {e!r}"
+            except Exception as e:
+                self.circuit_breaker.record_failure()
+                _LOGGER.error("Unexpected error: %s", e)
+                return None
+                
+            if not retryable or attempt >= self.retry_policy.max_retries:
+                _LOGGER.error("API request %s %s failed: %s", method, url, error)
+                return None
+                
+            delay = self.retry_policy.delay(attempt, retry_after)
+            _LOGGER.debug(
+                "API request %s %s failed (%s), retry %d in %.1fs",
+                method, url, error, attempt + 1, delay,
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
             
     async def get_available_devices(self, limit: int = 25, page: int = 1) -> Optional[Dict[str, Any]]:
         """Get list of available devices."""
         params = {"limit": limit, "page": page}
         return await self._make_request("GET", "/v1/devices/available", params=params)
         
+    async def get_all_available_devices(self, limit: int = 25) -> Optional[List[Dict[str, Any]]]:
+        """Get the brief of every available device across all pages."""
+        return await self.collect_pages("/v1/devices/available", limit=limit)
+        
+    async def iter_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        limit: int = 25,
+        priority: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every page of a paginated endpoint in page order.
+        
+        The first page is fetched on its own to read the PaginatedResource
+        metadata, then the remaining pages are fetched concurrently through
+        a sliding window of at most `concurrency` (default page_concurrency)
+        requests. At most that many pages are held in memory at once.
+        
+        Pages that cannot be fetched are skipped and IncompletePagesError
+        is raised after the last page, so a partial result is never
+        mistaken for a complete one.
+        """
+        params = dict(params or {})
+        concurrency = concurrency or self.page_concurrency
+        route = endpoint_route(endpoint)
+        
+        def fetch_page(page: int) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+            return asyncio.ensure_future(
+                self._make_request(
+                    "GET",
+                    endpoint,
+                    priority=priority,
+                    route=route,
+                    params={**params, "limit": limit, "page": page},
+                )
+            )
+            
+        first = await fetch_page(1)
+        if not first or "items" not in first:
+            raise IncompletePagesError(f"Failed to get page 1 of {endpoint}")
+        yield first
+        
+        total_pages = first.get("totalPages")
+        if total_pages is None:
+            # No page count in the response, follow nextPage links instead
+            page = first.get("nextPage") if first.get("hasNextPage") else None
+            while page:
+                response = await fetch_page(page)
+                if not response or "items" not in response:
+                    raise IncompletePagesError(f"Failed to get page {page} of {endpoint}")
+                yield response
+                page = response.get("nextPage") if response.get("hasNextPage") else None
+            return
+            
+        pages = iter(range(2, total_pages + 1))
+        pending = deque((page, fetch_page(page)) for page in islice(pages, concurrency))
+        failed = []
+        try:
+            while pending:
+                page, task = pending.popleft()
+                response = await task
+                next_page = next(pages, None)
+                if next_page is not None:
+                    pending.append((next_page, fetch_page(next_page)))
+                if not response or "items" not in response:
+                    failed.append(page)
+                    continue
+                yield response
+        finally:
+            for _, task in pending:
+                task.cancel()
+        if failed:
+            raise IncompletePagesError(f"Failed to get pages {failed} of {endpoint}")
+                
+    async def collect_pages(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        limit: int = 25,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Collect the items of every page of a paginated endpoint.
+        
+        Returns None when any page cannot be fetched, never a partial list.
+        """
+        items: List[Dict[str, Any]] = []
+        try:
+            async for response in self.iter_pages(endpoint, params, limit):
+                items.extend(response["items"])
+        except IncompletePagesError as err:
+            _LOGGER.warning("%s", err)
+            return None
+        return items
+        
     async def get_device_data(self, device_id: str) -> Optional[Dict[str, Any]]:
         """Get device data - FIXED: removed /data from endpoint."""
-        return await self._make_request("GET", f"/v1/devices/{device_id}")
-        
-    async def get_device_history(self, device_id: str, start_date: str = None, end_date: str = None) -> Optional[Dict[str, Any]]:
-        """Get device history data."""
-        params = {}
-        if start_date:
-            params["start_date"] = start_date
-        if end_date:
-            params["end_date"] = end_date
+        return await self._make_request("GET", f"/v1/devices/{device_id}", route=ROUTE_DEVICE)
+        
+    async def get_device_history(
+        self,
+        device_id: str,
+        start: int,
+        end: int,
+        limit: int = 1000,
+        page: int = 1,
+        sample: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Get a page of device history between two Unix timestamps.
+        
+        The range may not exceed 30 days, see history.HistoryBackfill for
+        longer ranges.
+        """
+        params = {"limit": limit, "page": page}
+        if sample:
+            params["sample"] = sample
             
-        return await self._make_request("GET", f"/v1/devices/{device_id}/history", params=params)
+        return await self._make_request(
+            "GET",
+            history_endpoint(device_id, start, end),
+            priority=PRIORITY_BACKGROUND,
+            route=ROUTE_HISTORY,
+            params=params,
+        )
+        
+    async def get_device_accumulated(self, device_id: str, start: int, end: int) -> Optional[Dict[str, Any]]:
+        """Get accumulated data of a device between two Unix timestamps.
+        
+        The range may not exceed 30 days.
+        """
+        return await self._make_request(
+            "GET",
+            f"/v1/devices/{device_id}/history/accumulated/{int(start)}/{int(end)}",
+            route=ROUTE_ACCUMULATED,
+        )
         
     async def get_system_status(self) -> Optional[Dict[str, Any]]:
         """Get system status."""
         return await self._make_request("GET", "/v1/system/status")
         
     async def control_device(self, device_id: str, control_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Control device parameters."""
-        return await self._make_request("POST", f"/v1/devices/{device_id}/control", json=control_data)
+        """Update device settings, returns the updated device."""
+        return await self._make_request(
+            "PATCH",
+            f"/v1/devices/{device_id}",
+            priority=PRIORITY_CONTROL,
+            route=ROUTE_DEVICE,
+            json=control_data,
+        )
         
     async def get_all_device_data(self) -> Dict[str, Any]:
         """Get data for all available devices."""
-        devices_response = await self.get_available_devices()
-        if not devices_response or "items" not in devices_response:
+        device_data, _ = await self.sweep_devices()
+        return device_data
+        
+    async def sweep_devices(
+        self, skip: Optional[Set[str]] = None
+    ) -> Tuple[Dict[str, Any], Optional[Set[str]]]:
+        """Get data for all available devices and the syncCodes listed.
+        
+        Devices in skip are not fetched. The listed syncCodes are None when
+        any page of the device listing failed. Listed devices missing from
+        the data failed to fetch, unless skipped.
+        """
+        if skip:
+            return await self._sweep_scoped(skip)
+        if self.bulk_poll:
+            return await self._sweep_bulk()
+        return await self._sweep_per_device()
+        
+    async def _sweep_per_device(self) -> Tuple[Dict[str, Any], Optional[Set[str]]]:
+        """Get data for all devices with one request per device."""
+        devices = await self.get_all_available_devices(limit=self.bulk_page_size)
+        if devices is None:
             _LOGGER.error("Failed to get available devices")
-            return {}
+            return {}, None
+            
+        device_ids = [device["syncCode"] for device in devices]
+        return await self.get_devices_data(device_ids), set(device_ids)
+        
+    async def _sweep_bulk(self) -> Tuple[Dict[str, Any], Optional[Set[str]]]:
+        """Get data for all devices from the paged /devices endpoint.
+        
+        Devices that are listed as available but missing from the bulk
+        result are fetched individually.
+        """
+        devices, device_data = await asyncio.gather(
+            self.get_all_available_devices(limit=self.bulk_page_size),
+            self._get_bulk_device_data(),
+        )
+        
+        if devices is None:
+            if not device_data:
+                _LOGGER.error("Failed to get available devices")
+            return device_data, None
+            
+        missing = [
+            device["syncCode"]
+            for device in devices
+            if device["syncCode"] not in device_data
+        ]
+        if missing:
+            _LOGGER.debug("Fetching %d devices missing from bulk result", len(missing))
+            device_data.update(await self.get_devices_data(missing))
             
+        return device_data, {device["syncCode"] for device in devices}
+        
+    async def _sweep_scoped(self, skip: Set[str]) -> Tuple[Dict[str, Any], Optional[Set[str]]]:
+        """Get data for every listed device not in skip.
+        
+        The listing comes first so its device types can pick the cheapest
+        way to fetch each model: the pages of /devices/model/{model} when
+        they take fewer requests than the model's wanted devices, otherwise
+        one request per device.
+        """
+        # Nothing else runs until the listing is in, so use large pages
+        devices = await self.get_all_available_devices(limit=self.bulk_page_size)
+        if devices is None:
+            _LOGGER.error("Failed to get available devices")
+            if not self.bulk_poll:
+                return {}, None
+            device_data = await self._get_bulk_device_data()
+            return {key: value for key, value in device_data.items() if key not in skip}, None
+            
+        model_sizes: Dict[Optional[str], int] = {}
+        wanted: Dict[Optional[str], List[str]] = {}
+        for device in devices:
+            model = device.get("deviceType")
+            model_sizes[model] = model_sizes.get(model, 0) + 1
+            if device["syncCode"] not in skip:
+                wanted.setdefault(model, []).append(device["syncCode"])
+                
+        models = []
+        single = []
+        for model, device_ids in wanted.items():
+            pages = math.ceil(model_sizes[model] / self.bulk_page_size)
+            if self.bulk_poll and model and pages < len(device_ids):
+                models.append(model)
+            else:
+                single.extend(device_ids)
+                
+        results = await asyncio.gather(
+            self.get_devices_data(single),
+            *(self._get_bulk_device_data(model_endpoint(model)) for model in models),
+        )
+        device_data: Dict[str, Any] = {}
+        for result in results:
+            device_data.update(result)
+        for device_id in skip & device_data.keys():
+            del device_data[device_id]
+            
+        missing = [
+            device_id
+            for model in models
+            for device_id in wanted[model]
+            if device_id not in device_data
+        ]
+        if missing:
+            _LOGGER.debug("Fetching %d devices missing from model results", len(missing))
+            device_data.update(await self.get_devices_data(missing))
+            
+        _LOGGER.debug(
+            "Fetched %d of %d devices, %d models in bulk, %d skipped",
+            len(device_data), len(devices), len(models), len(skip),
+        )
+        return device_data, {device["syncCode"] for device in devices}
+        
+    async def _get_bulk_device_data(self, endpoint: str = "/v1/devices") -> Dict[str, Any]:
+        """Build a {syncCode: payload} map from every page of /devices.
+        
+        Devices on pages that fail are left out, sweeps fetch listed
+        devices missing from the map individually.
+        """
         device_data = {}
-        tasks = []
         
-        for device in devices_response["items"]:
-            device_id = device["syncCode"]
-            tasks.append(self._get_single_device_data(device_id))
+        try:
+            async for response in self.iter_pages(endpoint, limit=self.bulk_page_size):
+                for device in response["items"]:
+                    sync_code = device.get("syncCode")
+                    if sync_code:
+                        device_data[sync_code] = device
+        except IncompletePagesError as err:
+            _LOGGER.warning("%s", err)
+                    
+        return device_data
+        
+    async def get_devices_data(self, device_ids: List[str]) -> Dict[str, Any]:
+        """Get data for the given devices concurrently."""
+        device_data = {}
+        tasks = [self._get_single_device_data(device_id) for device_id in device_ids]
             
         # Execute all requests concurrently
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        for i, result in enumerate(results):
-            device_id = devices_response["items"][i]["syncCode"]
+        for device_id, result in zip(device_ids, results):
             if isinstance(result, Exception):
-                _LOGGER.error(f"Failed to get device data for {device_id}: {result}")
+                _LOGGER.error("Failed to get device data for %s: %s", device_id, result)
             elif result:
                 device_data[device_id] = result
                 
@@ -109,12 +589,17 @@ class SensorLinxAPI:
         try:
             return await self.get_device_data(device_id)
         except Exception as e:
-            _LOGGER.error(f"Failed to get device data for {device_id}: {e}")
+            _LOGGER.error("Failed to get device data for %s: %s", device_id, e)
             return None
             
     async def close(self):
-        """Close the aiohttp session."""
-        if self.session and not self.session.closed:
+        """Close the aiohttp session if the client owns it.
+        
+        Interactions still buffered by a recording cassette are written.
+        """
+        if self.cassette is not None and not self.cassette.replaying:
+            await self.cassette.async_flush()
+        if self._owns_session and self.session and not self.session.closed:
             await self.session.close()
             
     async def __aenter__(self):
@@ -169,95 +654,16 @@ class SensorLinxDevice:
         metadata_keys = {"syncCode", "name", "deviceType", "firmVer", "connectedAt", "connected"}
         return {k: v for k, v in self._data.items() if k not in metadata_keys}
         
-    def get_sensor_definitions(self) -> Dict[str, Dict[str, Any]]:
-        """Get sensor definitions for this device type."""
-        sensors = {}
-        
-        if self.device_type == "THM":
-            # Temperature and humidity sensors for THM devices
-            sensor_configs = {
-                "heatTarget": {
-                    "name": "Heat Target",
-                    "unit": "°F",
-                    "device_class": "temperature",
-                    "state_class": "measurement",
-                    "icon": "mdi:thermometer-chevron-up"
-                },
-                "coolTarget": {
-                    "name": "Cool Target", 
-                    "unit": "°F",
-                    "device_class": "temperature",
-                    "state_class": "measurement",
-                    "icon": "mdi:thermometer-chevron-down"
-                },
-                "room": {
-                    "name": "Room Temperature",
-                    "unit": "°F", 
-                    "device_class": "temperature",
-                    "state_class": "measurement",
-                    "icon": "mdi:thermometer"
-                },
-                "floor": {
-                    "name": "Floor Temperature",
-                    "unit": "°F",
-                    "device_class": "temperature", 
-                    "state_class": "measurement",
-                    "icon": "mdi:thermometer-water"
-                },
-                "humidity": {
-                    "name": "Humidity",
-                    "unit": "%",
-                    "device_class": "humidity",
-                    "state_class": "measurement",
-                    "icon": "mdi:water-percent"
-                },
-                "demand1": {
-                    "name": "Demand 1",
-                    "unit": "",
-                    "device_class": None,
-                    "state_class": "measurement",
-                    "icon": "mdi:gauge"
-                },
-                "demand2": {
-                    "name": "Demand 2", 
-                    "unit": "",
-                    "device_class": None,
-                    "state_class": "measurement",
-                    "icon": "mdi:gauge"
-                },
-                "zone": {
-                    "name": "Zone",
-                    "unit": "",
-                    "device_class": None,
-                    "state_class": None,
-                    "icon": "mdi:home-group"
-                },
-                "priority": {
-                    "name": "Priority",
-                    "unit": "",
-                    "device_class": None,
-                    "state_class": None,
-                    "icon": "mdi:priority-high"
-                },
-                "humidityOn": {
-                    "name": "Humidity On",
-                    "unit": "",
-                    "device_class": None,
-                    "state_class": None,
-                    "icon": "mdi:water"
-                }
-            }
-            
-            # Only add sensors that have values in the device data
-            for sensor_key, config in sensor_configs.items():
-                if sensor_key in self._data:
-                    sensors[sensor_key] = config
-                    
-        elif self.device_type == "ZON":
-            # Add ZON device sensors when we have examples
-            pass
-            
-        return sensors
+    def get_sensor_definitions(self) -> Dict[str, SensorDescriptor]:
+        """Get sensor definitions for this device type.
+        
+        Only sensors that have values in the device data are returned.
+        """
+        return {
+            descriptor.key: descriptor
+            for descriptor in get_descriptors(self.device_type)
+            if descriptor.key in self._data
+        }
         
     def __repr__(self) -> str:
         """Return string representation."""
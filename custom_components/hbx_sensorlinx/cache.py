@@ -0,0 +1,102 @@
+"""Request deduplication for HBX SensorLinx integration."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> Hashable:
+    """Return a key identifying identical requests."""
+    if not params:
+        return (method, url)
+    return (method, url, tuple(sorted((str(key), str(value)) for key, value in params.items())))
+
+
+class ResponseCache:
+    """Bounded cache of recent responses with a time to live.
+
+    Entries expire ttl seconds after they are stored. The least recently
+    used entry is evicted once max_size is reached. A ttl of 0 disables
+    caching.
+    """
+
+    def __init__(self, ttl: float = 0.0, max_size: int = 256):
+        """Initialize the cache."""
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (True, response) on a hit and (False, None) otherwise."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a response."""
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries, expired ones included."""
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Share one in-flight request among concurrent identical callers.
+
+    The first caller of a key starts the request; callers arriving while
+    it runs await the same result instead of sending their own. Successful
+    results are also offered to the response cache. Results are shared, so
+    callers must not mutate them.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """Initialize the single-flight group."""
+        self.cache = cache if cache is not None else ResponseCache()
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0}
+
+    async def run(self, key: Hashable, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of request, deduplicated by key."""
+        hit, value = self.cache.get(key)
+        if hit:
+            self.stats["hits"] += 1
+            return value
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+        else:
+            self.stats["misses"] += 1
+            future = asyncio.ensure_future(self._fetch(key, request))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # One caller giving up must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: Hashable, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the request and cache a successful result."""
+        value = await request()
+        if value is not None:
+            self.cache.set(key, value)
+        return value
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of requests being shared."""
+        return len(self._in_flight)
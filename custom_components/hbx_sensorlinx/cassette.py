@@ -0,0 +1,238 @@
+"""Record and replay of API traffic for HBX SensorLinx integration.
+
+A cassette is a gzip compressed JSON lines file with one request and its
+response per line. Recorded requests keep only the endpoint, so a cassette
+replays against any base URL, and the API key is never written.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .cache import request_key
+from .const import CASSETTE_RECORD, CASSETTE_REPLAY
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACTED = "**REDACTED**"
+REDACTED_HEADERS = frozenset({"x-api-key", "authorization", "cookie"})
+
+# Response headers the client acts on, everything else is dropped
+KEPT_HEADERS = ("Retry-After",)
+
+# Answer to a request the cassette has no recording of
+NOT_RECORDED = (404, {}, b'{"message": "Not recorded"}')
+
+
+def interaction_key(
+    method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, body: Any = None
+) -> Hashable:
+    """Return the key matching a replayed request to its recordings."""
+    key = request_key(method, "/" + endpoint.lstrip("/"), params)
+    if body is None:
+        return key
+    return (key, json.dumps(body, sort_keys=True))
+
+
+def redact_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Return headers with credentials replaced."""
+    return {
+        name: REDACTED if name.lower() in REDACTED_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+class Cassette:
+    """Recorded API traffic.
+
+    In record mode interactions are buffered and appended to the file by
+    async_flush(), which runs the file I/O in an executor. In replay mode
+    every request is answered with the next recording of the same method,
+    endpoint, params and body, cycling through them in recorded order, so
+    repeated runs see the same sequence. Responses are delayed by their
+    recorded latency divided by speed; a speed of 0 answers immediately.
+
+    Recording stops once the file holds max_bytes, later interactions are
+    only counted as dropped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str,
+        speed: float = 1.0,
+        flush_size: int = 50,
+        max_bytes: Optional[int] = None,
+    ):
+        """Initialize the cassette."""
+        if mode not in (CASSETTE_RECORD, CASSETTE_REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.flush_size = flush_size
+        self.max_bytes = max_bytes
+        self.full = False
+        self._buffer: List[Dict[str, Any]] = []
+        self._write_lock = asyncio.Lock()
+        self._flush_task: Optional["asyncio.Future[None]"] = None
+        self._recordings: Dict[Hashable, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[Hashable, int] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "not_recorded": 0, "dropped": 0}
+
+    @property
+    def replaying(self) -> bool:
+        """Return True when requests are answered from the cassette."""
+        return self.mode == CASSETTE_REPLAY
+
+    def load(self) -> int:
+        """Read the recordings for replay and return how many there are.
+
+        Does blocking I/O, run it in an executor.
+        """
+        self._recordings.clear()
+        self._cursors.clear()
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                key = interaction_key(
+                    interaction["method"],
+                    interaction["endpoint"],
+                    interaction.get("params"),
+                    interaction.get("json"),
+                )
+                self._recordings.setdefault(key, []).append(interaction)
+                count += 1
+        _LOGGER.debug("Loaded %d interactions from %s", count, self.path)
+        return count
+
+    async def async_load(self) -> int:
+        """Read the recordings without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.load)
+
+    async def replay(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Return the next recorded status, headers and body of a request."""
+        key = interaction_key(method, endpoint, params, body)
+        recordings = self._recordings.get(key)
+        if not recordings:
+            self.stats["not_recorded"] += 1
+            _LOGGER.debug("No recording of %s %s %s", method, endpoint, params)
+            return NOT_RECORDED
+
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = (cursor + 1) % len(recordings)
+        interaction = recordings[cursor]
+        if self.speed > 0:
+            await asyncio.sleep(interaction.get("elapsed", 0.0) / self.speed)
+        self.stats["replayed"] += 1
+        return (
+            interaction["status"],
+            interaction.get("headers", {}),
+            interaction["body"].encode("utf-8"),
+        )
+
+    def record(
+        self,
+        method: str,
+        endpoint: str,
+        request_kwargs: Dict[str, Any],
+        status: int,
+        headers: Any,
+        body: bytes,
+        elapsed: float,
+    ) -> None:
+        """Buffer an interaction, written once flush_size are buffered.
+
+        Must be called from the event loop.
+        """
+        if self.full:
+            self.stats["dropped"] += 1
+            return
+        interaction = {
+            "method": method,
+            "endpoint": "/" + endpoint.lstrip("/"),
+            "status": status,
+            "elapsed": round(elapsed, 4),
+            "body": body.decode("utf-8", errors="replace"),
+        }
+        if request_kwargs.get("params"):
+            interaction["params"] = {
+                str(name): str(value) for name, value in request_kwargs["params"].items()
+            }
+        if request_kwargs.get("json") is not None:
+            interaction["json"] = request_kwargs["json"]
+        if request_kwargs.get("headers"):
+            interaction["request_headers"] = redact_headers(request_kwargs["headers"])
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        if kept:
+            interaction["headers"] = kept
+        self._buffer.append(interaction)
+        if len(self._buffer) >= self.flush_size and (
+            self._flush_task is None or self._flush_task.done()
+        ):
+            self._flush_task = asyncio.ensure_future(self.async_flush())
+
+    def _take(self) -> List[Dict[str, Any]]:
+        """Return the buffered interactions and empty the buffer."""
+        interactions, self._buffer = self._buffer, []
+        return interactions
+
+    def _write(self, interactions: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Append interactions to the file.
+
+        Every write adds a gzip member, which gzip readers read back as
+        one stream. Nothing is written to a file that already holds
+        max_bytes. Returns how many interactions were written and the
+        size of the file.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if not interactions or (self.max_bytes is not None and size >= self.max_bytes):
+            return 0, size
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            for interaction in interactions:
+                file.write(json.dumps(interaction, separators=(",", ":")))
+                file.write("\n")
+        return len(interactions), os.path.getsize(self.path)
+
+    def _written(self, interactions: List[Dict[str, Any]], written: int, size: int) -> None:
+        """Count what a write kept and stop recording once the file is full."""
+        self.stats["recorded"] += written
+        self.stats["dropped"] += len(interactions) - written
+        if self.max_bytes is None or size < self.max_bytes or self.full:
+            return
+        self.full = True
+        _LOGGER.warning(
+            "Cassette %s reached %d bytes, no longer recording", self.path, self.max_bytes
+        )
+
+    def flush(self) -> None:
+        """Write the buffered interactions, blocking."""
+        interactions = self._take()
+        self._written(interactions, *self._write(interactions))
+
+    async def async_flush(self) -> None:
+        """Write the buffered interactions without blocking the event loop."""
+        async with self._write_lock:
+            # Taken on the loop, record() keeps buffering while this writes
+            interactions = self._take()
+            written, size = await asyncio.get_running_loop().run_in_executor(
+                None, self._write, interactions
+            )
+            self._written(interactions, written, size)
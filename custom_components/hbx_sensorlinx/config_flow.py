@@ -9,9 +9,55 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import SensorLinxAPI
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, DEFAULT_URL
+from .const import (
+    DOMAIN,
+    CONF_BREAKER_RESET,
+    CONF_BREAKER_THRESHOLD,
+    CONF_BULK_POLL,
+    CONF_CACHE_TTL,
+    CONF_CASSETTE_MODE,
+    CONF_CONNECT_TIMEOUT,
+    CONF_DEGREE_BASE,
+    CONF_DERIVED_METRICS,
+    CONF_DERIVED_SEED,
+    CONF_DERIVED_WINDOW,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MAX_RETRIES,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_REPLAY_SPEED,
+    CONF_TEMPERATURE_DEADBAND,
+    CASSETTE_OFF,
+    CASSETTE_RECORD,
+    CASSETTE_REPLAY,
+    DEFAULT_BREAKER_RESET,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_BULK_POLL,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CASSETTE_MODE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_DEGREE_BASE,
+    DEFAULT_DERIVED_METRICS,
+    DEFAULT_DERIVED_SEED,
+    DEFAULT_DERIVED_WINDOW,
+    DEFAULT_DIAGNOSTIC_SENSORS,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_REPLAY_SPEED,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DEFAULT_URL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,23 +74,22 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 
 async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str, Any]:
     """Validate the user input allows us to connect."""
-    api = SensorLinxAPI(data[CONF_API_KEY], data[CONF_URL])
+    # A one-off check, Home Assistant's shared session is good enough
+    api = SensorLinxAPI(data[CONF_API_KEY], data[CONF_URL], session=async_get_clientsession(hass))
     
     try:
-        result = await api.get_available_devices()
-        if not result:
+        devices = await api.get_all_available_devices()
+        if not devices:
             raise CannotConnect("No devices returned from API")
         
         # Return info that you want to store in the config entry
         return {
-            "title": f"SensorLinx ({len(result.get('items', []))} devices)",
-            "devices_count": len(result.get('items', [])),
+            "title": f"SensorLinx ({len(devices)} devices)",
+            "devices_count": len(devices),
         }
     except Exception as err:
         _LOGGER.error("Error connecting to SensorLinx API: %s", err)
         raise CannotConnect(f"Cannot connect to SensorLinx API: {err}")
-    finally:
-        await api.close()
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -100,21 +145,141 @@ class SensorLinxOptionsFlow(config_entries.OptionsFlow):
     ) -> FlowResult:
         """Manage the options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # Options hidden outside advanced mode keep their values
+            return self.async_create_entry(
+                title="", data={**self.config_entry.options, **user_input}
+            )
 
-        return self.async_show_form(
-            step_id="init",
-            data_schema=vol.Schema(
+        schema = {
+            vol.Optional(
+                CONF_SCAN_INTERVAL,
+                default=self.config_entry.options.get(
+                    CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Optional(
+                CONF_BULK_POLL,
+                default=self.config_entry.options.get(
+                    CONF_BULK_POLL, DEFAULT_BULK_POLL
+                ),
+            ): bool,
+            vol.Optional(
+                CONF_MAX_POLL_INTERVAL,
+                default=self.config_entry.options.get(
+                    CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=86400)),
+            vol.Optional(
+                CONF_MAX_STALENESS,
+                default=self.config_entry.options.get(
+                    CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+            vol.Optional(
+                CONF_MAX_CONCURRENCY,
+                default=self.config_entry.options.get(
+                    CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(
+                CONF_RATE_LIMIT,
+                default=self.config_entry.options.get(
+                    CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000)),
+            vol.Optional(
+                CONF_CACHE_TTL,
+                default=self.config_entry.options.get(
+                    CONF_CACHE_TTL, DEFAULT_CACHE_TTL
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=300)),
+            vol.Optional(
+                CONF_CONNECT_TIMEOUT,
+                default=self.config_entry.options.get(
+                    CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=120)),
+            vol.Optional(
+                CONF_READ_TIMEOUT,
+                default=self.config_entry.options.get(
+                    CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=300)),
+            vol.Optional(
+                CONF_MAX_RETRIES,
+                default=self.config_entry.options.get(
+                    CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10)),
+            vol.Optional(
+                CONF_BREAKER_THRESHOLD,
+                default=self.config_entry.options.get(
+                    CONF_BREAKER_THRESHOLD, DEFAULT_BREAKER_THRESHOLD
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(
+                CONF_BREAKER_RESET,
+                default=self.config_entry.options.get(
+                    CONF_BREAKER_RESET, DEFAULT_BREAKER_RESET
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Optional(
+                CONF_TEMPERATURE_DEADBAND,
+                default=self.config_entry.options.get(
+                    CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+            vol.Optional(
+                CONF_DIAGNOSTIC_SENSORS,
+                default=self.config_entry.options.get(
+                    CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS
+                ),
+            ): bool,
+            vol.Optional(
+                CONF_DERIVED_METRICS,
+                default=self.config_entry.options.get(
+                    CONF_DERIVED_METRICS, DEFAULT_DERIVED_METRICS
+                ),
+            ): bool,
+            vol.Optional(
+                CONF_DERIVED_WINDOW,
+                default=self.config_entry.options.get(
+                    CONF_DERIVED_WINDOW, DEFAULT_DERIVED_WINDOW
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=1440)),
+            vol.Optional(
+                CONF_DEGREE_BASE,
+                default=self.config_entry.options.get(
+                    CONF_DEGREE_BASE, DEFAULT_DEGREE_BASE
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=32, max=80)),
+            vol.Optional(
+                CONF_DERIVED_SEED,
+                default=self.config_entry.options.get(
+                    CONF_DERIVED_SEED, DEFAULT_DERIVED_SEED
+                ),
+            ): bool,
+        }
+        # Record/replay is a profiling tool, not an end-user setting
+        if self.show_advanced_options:
+            schema.update(
                 {
                     vol.Optional(
-                        CONF_SCAN_INTERVAL,
+                        CONF_CASSETTE_MODE,
+                        default=self.config_entry.options.get(
+                            CONF_CASSETTE_MODE, DEFAULT_CASSETTE_MODE
+                        ),
+                    ): vol.In([CASSETTE_OFF, CASSETTE_RECORD, CASSETTE_REPLAY]),
+                    vol.Optional(
+                        CONF_REPLAY_SPEED,
                         default=self.config_entry.options.get(
-                            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+                            CONF_REPLAY_SPEED, DEFAULT_REPLAY_SPEED
                         ),
-                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1000)),
                 }
-            ),
-        )
+            )
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
 
 
 # Add the options flow to the config entry
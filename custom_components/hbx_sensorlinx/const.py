@@ -6,6 +6,119 @@ MANUFACTURER = "HBX Controls"
 DEFAULT_URL = "https://connect.sensorlinx.co"
 DEFAULT_SCAN_INTERVAL = 30  # seconds
 
+# Polling options
+CONF_BULK_POLL = "bulk_poll"
+DEFAULT_BULK_POLL = True
+BULK_PAGE_SIZE = 100  # devices per /devices page
+PAGE_CONCURRENCY = 20  # pages fetched in parallel after the first
+
+# Adaptive polling, devices back off up to this interval while idle
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+DEFAULT_MAX_POLL_INTERVAL = 300  # seconds, the scan interval disables backoff
+
+# Last good data of devices whose fetch fails
+CONF_MAX_STALENESS = "max_staleness"
+DEFAULT_MAX_STALENESS = 900  # seconds before a failing device goes unavailable
+
+# Request scheduling
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_RATE_LIMIT = "rate_limit"
+DEFAULT_MAX_CONCURRENCY = 8  # requests in flight per config entry
+DEFAULT_RATE_LIMIT = 20.0  # requests per second per config entry
+
+# Response cache, concurrent identical GETs are always deduplicated
+CONF_CACHE_TTL = "cache_ttl"
+DEFAULT_CACHE_TTL = 0.0  # seconds, 0 disables the cache
+RESPONSE_CACHE_SIZE = 256  # responses
+
+# Large paginated bodies are decoded an item at a time between loop turns
+DECODE_INCREMENTAL_SIZE = 1024 * 1024  # bytes, smaller bodies decode in a few ms
+DECODE_SLICE_TIME = 0.002  # seconds of decoding between loop turns
+
+# Connection pool shared by the config entries of one host
+POOL_LIMIT_PER_HOST = 32  # connections
+POOL_DNS_CACHE_TTL = 300  # seconds
+POOL_KEEPALIVE_TIMEOUT = 60  # seconds, longer than the default scan interval
+
+# Transport resilience
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_MAX_RETRIES = "max_retries"
+CONF_BREAKER_THRESHOLD = "breaker_threshold"
+CONF_BREAKER_RESET = "breaker_reset"
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_READ_TIMEOUT = 30  # seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BREAKER_THRESHOLD = 5  # consecutive failures before opening
+DEFAULT_BREAKER_RESET = 60  # seconds before a half-open probe
+
+# Change-aware entity updates
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+DEFAULT_TEMPERATURE_DEADBAND = 0.0  # °F, 0 writes every change
+DEADBAND_SENSORS = ("room", "floor")
+
+# Instrumentation
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+DEFAULT_DIAGNOSTIC_SENSORS = False
+
+# Derived metrics computed from each refresh
+CONF_DERIVED_METRICS = "derived_metrics"
+CONF_DERIVED_WINDOW = "derived_window"
+CONF_DEGREE_BASE = "degree_base"
+CONF_DERIVED_SEED = "derived_seed"
+DEFAULT_DERIVED_METRICS = False
+DEFAULT_DERIVED_WINDOW = 60  # minutes of rolling statistics and duty cycle
+DEFAULT_DEGREE_BASE = 65.0  # °F, heating degree-hours accrue below this
+DEFAULT_DERIVED_SEED = True  # fill the windows from history at startup
+DEGREE_HOURS_WINDOW = 24 * 3600  # seconds of heating degree-hours
+DERIVED_PRECISION = 1  # decimals, entities update when the rounded value changes
+DERIVED_ROLLING_KEYS = ("room", "floor")  # rolling mean, min and max
+DERIVED_DUTY_KEYS = ("demand1", "demand2", "demands")  # duty cycle, active while above 0
+DERIVED_OUTDOOR_KEYS = ("outdoorTemperature",)  # heating degree-hours
+
+# Record/replay of API traffic for offline profiling
+CONF_CASSETTE_MODE = "cassette_mode"
+CONF_REPLAY_SPEED = "replay_speed"
+CASSETTE_OFF = "off"
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+DEFAULT_CASSETTE_MODE = CASSETTE_OFF
+DEFAULT_REPLAY_SPEED = 1.0  # 1 keeps the recorded latency, 0 answers at once
+CASSETTE_FILE = DOMAIN + ".{}.cassette.jsonl.gz"  # in .storage, per config entry
+CASSETTE_FLUSH_SIZE = 50  # interactions buffered before writing
+CASSETTE_MAX_BYTES = 50 * 1024 * 1024  # recording stops once the file holds this
+
+# Warm-start snapshot
+SNAPSHOT_STORAGE_KEY = DOMAIN + ".{}.snapshot"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # seconds, coalesces writes across refreshes
+
+# History import
+HISTORY_IMPORT_STORAGE_KEY = DOMAIN + ".history_import"
+HISTORY_IMPORT_STORAGE_VERSION = 1
+HISTORY_IMPORT_DEFAULT_DAYS = 30  # first import when no start is given
+HISTORY_TIME_KEYS = ("timestamp", "createdAt", "time", "date")  # record time fields
+
+# History export to files
+EXPORT_WINDOW = 7 * 24 * 3600  # seconds of history per file
+EXPORT_BATCH_SIZE = 5000  # records buffered per file before writing
+EXPORT_CHECKPOINT_FILE = "checkpoint.json"
+
+SERVICE_IMPORT_HISTORY = "import_history"
+ATTR_SYNC_CODES = "sync_codes"
+ATTR_START = "start"
+ATTR_END = "end"
+
+# Device writes
+WRITE_DEBOUNCE = 1.0  # seconds, changes to a device within this are merged
+SERVICE_SET_VALUES = "set_values"
+ATTR_VALUES = "values"
+
+# Accumulated (energy/volume) data
+ACCUMULATED_SCAN_INTERVAL = 300  # seconds
+ACCUMULATED_STORAGE_KEY = DOMAIN + ".{}.accumulated"
+ACCUMULATED_STORAGE_VERSION = 1
+
 # Device types
 DEVICE_TYPE_THM = "THM"
 DEVICE_TYPE_ZON = "ZON"
@@ -89,6 +202,48 @@ THM_SENSORS = {
     }
 }
 
+# Totals read from the accumulated history endpoint, keyed by device type
+ACCUMULATED_SENSORS = {
+    "BTU": {
+        "btuAll": {
+            "name": "Energy",
+            "unit": "BTU",
+            "device_class": None,
+            "icon": "mdi:lightning-bolt",
+        },
+    },
+    "ENG": {
+        "lifetimeHeating": {
+            "name": "Accumulated Heating",
+            "unit": "BTU",
+            "device_class": None,
+            "icon": "mdi:fire",
+        },
+        "lifetimeCooling": {
+            "name": "Accumulated Cooling",
+            "unit": "BTU",
+            "device_class": None,
+            "icon": "mdi:snowflake",
+        },
+    },
+    "FLO": {
+        "lifetimeVolume": {
+            "name": "Lifetime Volume",
+            "unit": "gal",
+            "device_class": "water",
+            "icon": "mdi:water",
+        },
+    },
+    "FLW": {
+        "totalVolume": {
+            "name": "Total Volume",
+            "unit": "gal",
+            "device_class": "water",
+            "icon": "mdi:water",
+        },
+    },
+}
+
 # Add other device sensor definitions as needed
 ZON_SENSORS = {
     # Add ZON sensor definitions when available
@@ -108,3 +263,8 @@ DEVICE_SENSORS = {
     DEVICE_TYPE_WFS: WFS_SENSORS,
     DEVICE_TYPE_WPS: WPS_SENSORS,
 }
+
+# Settings a device accepts through set_values, keyed by device type
+WRITABLE_FIELDS = {
+    DEVICE_TYPE_THM: ("heatTarget", "coolTarget"),
+}
@@ -0,0 +1,90 @@
+"""Debounced device writes for HBX SensorLinx integration."""
+import asyncio
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .const import WRITE_DEBOUNCE
+from .coordinator import SensorLinxDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceWriter:
+    """Coalesce setting changes into one PATCH per device.
+
+    Changes are shown on the entities immediately through the coordinator.
+    A device's changes are sent once it has had no further changes for the
+    debounce delay, every change restarts the delay. A burst of writes,
+    such as a slider drag, results in one request carrying the latest
+    value of every field. Requests to one device never overlap, changes
+    made while a request is in flight go out with the next one.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: SensorLinxDataUpdateCoordinator,
+        delay: float = WRITE_DEBOUNCE,
+    ):
+        """Initialize the writer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.delay = delay
+        self._queued: Dict[str, Dict[str, Any]] = {}
+        self._timers: Dict[str, CALLBACK_TYPE] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"changes": 0, "requests": 0, "failed": 0}
+
+    async def async_write(self, sync_code: str, changes: Dict[str, Any]) -> bool:
+        """Queue changes to a device, returns False if the device is unknown."""
+        if not self.coordinator.async_apply_changes(sync_code, changes):
+            return False
+
+        self._queued.setdefault(sync_code, {}).update(changes)
+        self.stats["changes"] += len(changes)
+
+        cancel = self._timers.pop(sync_code, None)
+        if cancel is not None:
+            cancel()
+        self._timers[sync_code] = async_call_later(
+            self.hass, self.delay, partial(self._async_timer, sync_code)
+        )
+        return True
+
+    async def _async_timer(self, sync_code: str, _now: datetime) -> None:
+        """Send the changes of a device that has settled."""
+        self._timers.pop(sync_code, None)
+        await self._async_send(sync_code)
+
+    async def _async_send(self, sync_code: str) -> None:
+        """Send the queued changes of a device."""
+        # Taken once the previous request is done, so it carries every
+        # change queued meanwhile
+        async with self._locks.setdefault(sync_code, asyncio.Lock()):
+            changes = self._queued.pop(sync_code, None)
+            if not changes:
+                return
+
+            self.stats["requests"] += 1
+            response = await self.coordinator.api.control_device(sync_code, changes)
+            if response is None:
+                self.stats["failed"] += 1
+            elif not isinstance(response, dict):
+                response = {}
+            self.coordinator.async_resolve_changes(sync_code, changes, response)
+        if response is not None and response.get("syncCode") != sync_code:
+            # Accepted without the updated device, read it back
+            await self.coordinator.async_refresh_devices([sync_code])
+
+    async def async_shutdown(self) -> None:
+        """Send everything still queued."""
+        for cancel in self._timers.values():
+            cancel()
+        self._timers.clear()
+        for sync_code in list(self._queued):
+            await self._async_send(sync_code)
@@ -0,0 +1,136 @@
+"""Response body decoding for HBX SensorLinx integration.
+
+Small bodies are decoded in one go with the fastest decoder available.
+Large paginated bodies, such as unsampled history pages, are decoded one
+item at a time, handing control back to the event loop between slices so
+a multi-megabyte page never blocks it for more than a few milliseconds.
+
+Decoding large bodies in an executor does not help: the C decoders hold
+the GIL for the whole call, so the event loop waits just as long.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from .const import DECODE_INCREMENTAL_SIZE, DECODE_SLICE_TIME
+
+try:  # orjson ships with Home Assistant, parses bytes without a str copy
+    from orjson import loads as fast_loads
+except ImportError:
+    fast_loads = json.loads
+
+# Key of the list decoded incrementally, as in every PaginatedResource
+ITEMS_KEY = "items"
+
+# Items decoded between checks of the slice deadline
+ITEMS_PER_CHECK = 32
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _item_decoder() -> Callable[[str, int], Tuple[Any, int]]:
+    """Return a raw_decode sharing key strings across calls.
+
+    The C decoder only shares repeated keys within one call, so without
+    this every item would hold its own copy of every key.
+    """
+    keys: Dict[str, str] = {}
+
+    def object_pairs_hook(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        return {keys.setdefault(key, key): value for key, value in pairs}
+
+    return json.JSONDecoder(object_pairs_hook=object_pairs_hook).raw_decode
+
+
+class BodyDecoder:
+    """Decode JSON bodies, picking the strategy by size."""
+
+    def __init__(
+        self,
+        incremental_size: int = DECODE_INCREMENTAL_SIZE,
+        slice_time: float = DECODE_SLICE_TIME,
+        loads: Callable[[bytes], Any] = fast_loads,
+    ):
+        """Initialize the decoder.
+
+        Bodies of incremental_size bytes or more are decoded incrementally,
+        yielding to the event loop every slice_time seconds.
+        """
+        self.incremental_size = incremental_size
+        self.slice_time = slice_time
+        self.loads = loads
+        self.stats = {"inline": 0, "incremental": 0, "incremental_bytes": 0, "yields": 0}
+
+    async def decode(self, body: bytes) -> Any:
+        """Return the decoded body."""
+        if len(body) < self.incremental_size:
+            self.stats["inline"] += 1
+            return self.loads(body)
+
+        text = body.decode("utf-8")
+        start = WHITESPACE.match(text).end()
+        if not text.startswith("{", start):
+            # Only objects carry items, decode anything else at once
+            self.stats["inline"] += 1
+            return self.loads(body)
+        self.stats["incremental"] += 1
+        self.stats["incremental_bytes"] += len(body)
+        try:
+            value, end = await self._decode_object(text, start, _item_decoder())
+        except IndexError as err:
+            raise ValueError("Unexpected end of JSON body") from err
+        if WHITESPACE.match(text, end).end() != len(text):
+            raise ValueError(f"Extra data after JSON body at {end}")
+        return value
+
+    async def _decode_object(
+        self, text: str, index: int, raw_decode: Callable[[str, int], Tuple[Any, int]]
+    ) -> Tuple[Dict[str, Any], int]:
+        """Decode the object at index, the items list incrementally."""
+        result: Dict[str, Any] = {}
+        index = WHITESPACE.match(text, index + 1).end()
+        if text[index] == "}":
+            return result, index + 1
+        while True:
+            key, index = raw_decode(text, index)
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a key at {index}")
+            index = WHITESPACE.match(text, index).end()
+            if text[index] != ":":
+                raise ValueError(f"Expected ':' at {index}")
+            index = WHITESPACE.match(text, index + 1).end()
+            if key == ITEMS_KEY and text[index] == "[":
+                result[key], index = await self._decode_items(text, index, raw_decode)
+            else:
+                result[key], index = raw_decode(text, index)
+            index = WHITESPACE.match(text, index).end()
+            if text[index] == "}":
+                return result, index + 1
+            if text[index] != ",":
+                raise ValueError(f"Expected ',' or '}}' at {index}")
+            index = WHITESPACE.match(text, index + 1).end()
+
+    async def _decode_items(
+        self, text: str, index: int, raw_decode: Callable[[str, int], Tuple[Any, int]]
+    ) -> Tuple[List[Any], int]:
+        """Decode the list at index one item at a time."""
+        items: List[Any] = []
+        index = WHITESPACE.match(text, index + 1).end()
+        if text[index] == "]":
+            return items, index + 1
+        deadline = time.monotonic() + self.slice_time
+        while True:
+            item, index = raw_decode(text, index)
+            items.append(item)
+            index = WHITESPACE.match(text, index).end()
+            if text[index] == "]":
+                return items, index + 1
+            if text[index] != ",":
+                raise ValueError(f"Expected ',' or ']' at {index}")
+            index = WHITESPACE.match(text, index + 1).end()
+            if len(items) % ITEMS_PER_CHECK == 0 and time.monotonic() >= deadline:
+                self.stats["yields"] += 1
+                await asyncio.sleep(0)
+                deadline = time.monotonic() + self.slice_time
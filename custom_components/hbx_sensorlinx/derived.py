@@ -0,0 +1,442 @@
+"""Metrics derived from device readings for HBX SensorLinx integration.
+
+Every refresh adds one sample per source reading to a fixed-size ring
+buffer per device. Readings are treated as a step function, each value
+holding until the next sample, so the statistics are time weighted and do
+not depend on how evenly refreshes are spaced. Adding a sample and reading
+the mean, minimum, maximum or integral of a window are O(1) amortized:
+running sums cover the mean and integral, monotonic queues the extremes.
+"""
+import logging
+import math
+from array import array
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from .const import (
+    DEGREE_HOURS_WINDOW,
+    DERIVED_DUTY_KEYS,
+    DERIVED_OUTDOOR_KEYS,
+    DERIVED_PRECISION,
+    DERIVED_ROLLING_KEYS,
+)
+from .descriptors import SensorDescriptor, get_descriptors
+from .history import HistoryBackfill, record_timestamp
+from .snapshot import DeviceSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+# Suffixes of the rolling statistics of a reading
+ROLLING_STATISTICS = ("mean", "min", "max")
+
+DEGREE_HOURS_KEY = "heating_degree_hours"
+
+
+class RollingWindow:
+    """Time weighted statistics of a reading over a sliding time window.
+
+    Samples live in a ring buffer of fixed capacity. Each sample opens a
+    segment that lasts until the next one; the newest segment lasts until
+    the time of the query. Segments that end before the window are dropped
+    as time moves on, and the oldest is dropped early when the ring is
+    full, shortening the covered time rather than growing the buffer.
+    """
+
+    __slots__ = (
+        "window", "capacity", "_times", "_values", "_head", "_count",
+        "_area", "_evictions", "_min", "_max",
+    )
+
+    def __init__(self, window: float, capacity: int, extremes: bool = True):
+        """Initialize an empty window of window seconds."""
+        self.window = window
+        self.capacity = max(capacity, 2)
+        self._times = array("d", bytes(8 * self.capacity))
+        self._values = array("d", bytes(8 * self.capacity))
+        # Position of the oldest sample, samples are numbered from there on
+        self._head = 0
+        self._count = 0
+        # Integral of the closed segments, every segment but the newest
+        self._area = 0.0
+        self._evictions = 0
+        # Sample numbers with increasing values (min) or decreasing (max)
+        self._min: Optional[Deque[int]] = deque() if extremes else None
+        self._max: Optional[Deque[int]] = deque() if extremes else None
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return self._count
+
+    def _slot(self, number: int) -> int:
+        """Return the buffer position of a sample number."""
+        return number % self.capacity
+
+    @property
+    def last_time(self) -> Optional[float]:
+        """Return the time of the newest sample."""
+        if not self._count:
+            return None
+        return self._times[self._slot(self._head + self._count - 1)]
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample, samples older than the newest one are dropped."""
+        values = self._values
+        if self._count:
+            slot = self._slot(self._head + self._count - 1)
+            last_time = self._times[slot]
+            if timestamp < last_time:
+                return
+            if values[slot] == value:
+                # Still the same step, the open segment simply continues
+                return
+            if timestamp == last_time:
+                # Same instant, correct the newest sample. Samples the old
+                # value pushed out of the queues may be extremes again
+                values[slot] = value
+                self._rebuild_extremes()
+                return
+            self._area += values[slot] * (timestamp - last_time)
+            if self._count == self.capacity:
+                self._evict()
+
+        number = self._head + self._count
+        slot = self._slot(number)
+        self._times[slot] = timestamp
+        values[slot] = value
+        self._count += 1
+        self._push_extreme(number, value)
+
+    def _push_extreme(self, number: int, value: float) -> None:
+        """Add a sample to the monotonic queues."""
+        if self._min is None:
+            return
+        values = self._values
+        while self._min and values[self._slot(self._min[-1])] >= value:
+            self._min.pop()
+        self._min.append(number)
+        while self._max and values[self._slot(self._max[-1])] <= value:
+            self._max.pop()
+        self._max.append(number)
+
+    def _rebuild_extremes(self) -> None:
+        """Refill the monotonic queues from the samples held."""
+        if self._min is None:
+            return
+        self._min.clear()
+        self._max.clear()
+        for number in range(self._head, self._head + self._count):
+            self._push_extreme(number, self._values[self._slot(number)])
+
+    def _evict(self) -> None:
+        """Drop the oldest sample and its closed segment."""
+        head = self._head
+        slot = self._slot(head)
+        next_time = self._times[self._slot(head + 1)]
+        self._area -= self._values[slot] * (next_time - self._times[slot])
+        self._head += 1
+        self._count -= 1
+        if self._min is not None:
+            for queue in (self._min, self._max):
+                if queue and queue[0] == head:
+                    queue.popleft()
+        self._evictions += 1
+        if self._evictions >= self.capacity:
+            # Re-sum once per lap so add/subtract rounding cannot build up
+            self._evictions = 0
+            self._area = self._closed_area()
+
+    def _closed_area(self) -> float:
+        """Return the integral of the closed segments, summed afresh."""
+        times, values = self._times, self._values
+        return math.fsum(
+            values[self._slot(number)] * (times[self._slot(number + 1)] - times[self._slot(number)])
+            for number in range(self._head, self._head + self._count - 1)
+        )
+
+    def expire(self, now: float) -> None:
+        """Drop the samples whose segment ended before the window."""
+        start = now - self.window
+        while self._count >= 2 and self._times[self._slot(self._head + 1)] <= start:
+            self._evict()
+
+    def _coverage(self, now: float) -> Tuple[float, float]:
+        """Return the integral over the window and the time it covers."""
+        self.expire(now)
+        times, values = self._times, self._values
+        first = self._slot(self._head)
+        newest = self._slot(self._head + self._count - 1)
+        start = now - self.window
+        area = self._area + values[newest] * max(now - times[newest], 0.0)
+        if times[first] < start:
+            # The oldest segment started before the window, clip it
+            area -= values[first] * (start - times[first])
+        return area, now - max(times[first], start)
+
+    def mean(self, now: float) -> Optional[float]:
+        """Return the time weighted mean over the window."""
+        if not self._count:
+            return None
+        area, covered = self._coverage(now)
+        if covered <= 0:
+            return self._values[self._slot(self._head + self._count - 1)]
+        return area / covered
+
+    def integral(self, now: float) -> Optional[float]:
+        """Return the integral over the window in value-seconds."""
+        if not self._count:
+            return None
+        return self._coverage(now)[0]
+
+    def minimum(self, now: float) -> Optional[float]:
+        """Return the lowest value held during the window."""
+        if not self._count or self._min is None:
+            return None
+        self.expire(now)
+        return self._values[self._slot(self._min[0])]
+
+    def maximum(self, now: float) -> Optional[float]:
+        """Return the highest value held during the window."""
+        if not self._count or self._max is None:
+            return None
+        self.expire(now)
+        return self._values[self._slot(self._max[0])]
+
+
+@lru_cache(maxsize=None)
+def get_derived_descriptors(device_type: Optional[str]) -> Tuple[SensorDescriptor, ...]:
+    """Return the derived sensor descriptors of a device type."""
+    sources = {descriptor.key: descriptor for descriptor in get_descriptors(device_type)}
+    descriptors = []
+    for key in DERIVED_ROLLING_KEYS:
+        if key in sources:
+            source = sources[key]
+            descriptors.extend(
+                SensorDescriptor(
+                    key=f"{key}_{statistic}",
+                    name=f"{source.name} {statistic.capitalize()}",
+                    unit=source.unit,
+                    device_class=source.device_class,
+                    state_class="measurement",
+                    icon="mdi:chart-bell-curve" if statistic == "mean" else "mdi:chart-line-variant",
+                )
+                for statistic in ROLLING_STATISTICS
+            )
+    for key in DERIVED_DUTY_KEYS:
+        if key in sources:
+            descriptors.append(
+                SensorDescriptor(
+                    key=f"{key}_duty_cycle",
+                    name=f"{sources[key].name} Duty Cycle",
+                    unit="%",
+                    state_class="measurement",
+                    icon="mdi:percent",
+                )
+            )
+    if any(key in sources for key in DERIVED_OUTDOOR_KEYS):
+        descriptors.append(
+            SensorDescriptor(
+                key=DEGREE_HOURS_KEY,
+                name="Heating Degree Hours",
+                unit="°F·h",
+                state_class="measurement",
+                icon="mdi:thermometer-chevron-down",
+            )
+        )
+    return tuple(descriptors)
+
+
+def _number(value: Any) -> Optional[float]:
+    """Return a reading as a float, None when it is not a number."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class DeviceMetrics:
+    """Rolling windows of the source readings of one device."""
+
+    __slots__ = ("rolling", "duty", "outdoor")
+
+    def __init__(self, device_type: Optional[str], engine: "DerivedMetrics"):
+        """Create the windows of the readings the device reports."""
+        keys = {descriptor.key for descriptor in get_descriptors(device_type)}
+        self.rolling = {
+            key: RollingWindow(engine.window, engine.capacity(engine.window))
+            for key in DERIVED_ROLLING_KEYS
+            if key in keys
+        }
+        self.duty = {
+            key: RollingWindow(engine.window, engine.capacity(engine.window), extremes=False)
+            for key in DERIVED_DUTY_KEYS
+            if key in keys
+        }
+        outdoor = next((key for key in DERIVED_OUTDOOR_KEYS if key in keys), None)
+        self.outdoor: Optional[Tuple[str, RollingWindow]] = None
+        if outdoor is not None:
+            self.outdoor = (
+                outdoor,
+                RollingWindow(
+                    engine.degree_window, engine.capacity(engine.degree_window), extremes=False
+                ),
+            )
+
+    def add(self, timestamp: float, reading: Any, degree_base: float) -> None:
+        """Add the readings of a snapshot or history record."""
+        for key, window in self.rolling.items():
+            value = _number(reading.get(key))
+            if value is not None:
+                window.add(timestamp, value)
+        for key, window in self.duty.items():
+            value = _number(reading.get(key))
+            if value is not None:
+                window.add(timestamp, 1.0 if value > 0 else 0.0)
+        if self.outdoor is not None:
+            key, window = self.outdoor
+            value = _number(reading.get(key))
+            if value is not None:
+                window.add(timestamp, max(degree_base - value, 0.0))
+
+    def values(self, now: float) -> Dict[str, Optional[float]]:
+        """Return the derived values at now."""
+        values: Dict[str, Optional[float]] = {}
+        for key, window in self.rolling.items():
+            values[f"{key}_mean"] = window.mean(now)
+            values[f"{key}_min"] = window.minimum(now)
+            values[f"{key}_max"] = window.maximum(now)
+        for key, window in self.duty.items():
+            mean = window.mean(now)
+            values[f"{key}_duty_cycle"] = None if mean is None else mean * 100
+        if self.outdoor is not None:
+            integral = self.outdoor[1].integral(now)
+            values[DEGREE_HOURS_KEY] = None if integral is None else integral / HOUR
+        return {
+            key: None if value is None else round(value, DERIVED_PRECISION)
+            for key, value in values.items()
+        }
+
+
+class DerivedMetrics:
+    """Derived metrics of every device, updated from coordinator data.
+
+    Rolling statistics and duty cycles cover window seconds, heating
+    degree-hours accrue below degree_base over degree_window seconds.
+    Ring buffers hold one sample per sample_interval across their window,
+    the shortest interval between refreshes.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        degree_base: float,
+        sample_interval: float,
+        degree_window: float = DEGREE_HOURS_WINDOW,
+    ):
+        """Initialize the engine."""
+        self.window = window
+        self.degree_base = degree_base
+        self.sample_interval = sample_interval
+        self.degree_window = degree_window
+        self.devices: Dict[str, DeviceMetrics] = {}
+        self.values: Dict[str, Dict[str, Optional[float]]] = {}
+        # Devices being seeded from history, live samples would come first
+        self._seeding: Set[str] = set()
+        self.stats = {"samples": 0, "seeded_records": 0}
+
+    def capacity(self, window: float) -> int:
+        """Return the ring buffer size covering window."""
+        return math.ceil(window / self.sample_interval) + 2
+
+    def _device(self, device_id: str, device_type: Optional[str]) -> Optional[DeviceMetrics]:
+        """Return the metrics of a device, None when it has no sources."""
+        metrics = self.devices.get(device_id)
+        if metrics is None and get_derived_descriptors(device_type):
+            metrics = self.devices[device_id] = DeviceMetrics(device_type, self)
+        return metrics
+
+    def update(
+        self,
+        data: Dict[str, DeviceSnapshot],
+        now: float,
+        samples: Dict[str, DeviceSnapshot],
+    ) -> Set[Tuple[str, str]]:
+        """Sample the devices and return the (device, key) values that changed.
+
+        data holds every known device, samples the fresh readings of the
+        devices just fetched. The values of the others age with their
+        windows but take no sample, so cached or unpolled data is not
+        counted again.
+        """
+        changed: Set[Tuple[str, str]] = set()
+        for device_id, snapshot in data.items():
+            if device_id in self._seeding:
+                continue
+            metrics = self._device(device_id, snapshot.device_type)
+            if metrics is None:
+                continue
+            sample = samples.get(device_id)
+            if sample is not None and sample.connected:
+                metrics.add(now, sample, self.degree_base)
+                self.stats["samples"] += 1
+            values = metrics.values(now)
+            previous = self.values.get(device_id, {})
+            changed.update(
+                (device_id, key) for key, value in values.items() if previous.get(key) != value
+            )
+            self.values[device_id] = values
+
+        for device_id in self.devices.keys() - data.keys():
+            del self.devices[device_id]
+            self.values.pop(device_id, None)
+        return changed
+
+    def value(self, device_id: str, key: str) -> Optional[float]:
+        """Return a derived value."""
+        return self.values.get(device_id, {}).get(key)
+
+    async def async_seed(
+        self, backfill: HistoryBackfill, devices: Dict[str, Optional[str]], now: float
+    ) -> int:
+        """Fill the windows from device history and return the records used.
+
+        devices maps each syncCode to its device type. Refreshes skip the
+        devices until their history is in, the newest value then carries
+        on until the next refresh samples it.
+        """
+        seeded = {
+            device_id: DeviceMetrics(device_type, self)
+            for device_id, device_type in devices.items()
+            if get_derived_descriptors(device_type)
+        }
+        if not seeded:
+            return 0
+        # Degree-hours need a longer history than the rolling windows
+        spans: Dict[float, List[str]] = {}
+        for device_id, metrics in seeded.items():
+            span = max(self.window, self.degree_window) if metrics.outdoor else self.window
+            spans.setdefault(span, []).append(device_id)
+
+        records = 0
+        self._seeding.update(seeded)
+        try:
+            for span, device_ids in spans.items():
+                async for device_id, record in backfill.iter_devices(
+                    device_ids, int(now - span), int(now)
+                ):
+                    timestamp = record_timestamp(record)
+                    if timestamp is None or timestamp > now:
+                        continue
+                    seeded[device_id].add(timestamp, record, self.degree_base)
+                    records += 1
+        finally:
+            self._seeding.difference_update(seeded)
+        self.devices.update(seeded)
+        self.stats["seeded_records"] += records
+        _LOGGER.debug("Seeded derived metrics of %d devices from %d records", len(seeded), records)
+        return records
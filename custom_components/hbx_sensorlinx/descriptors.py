@@ -0,0 +1,157 @@
+"""Sensor descriptors for every SensorLinx device model.
+
+Descriptors are derived from the model schemas in
+sensorlinx-connect-api.json, with the hand written definitions in const.py
+taking precedence. The schema file is read once at import and the
+descriptors of a model are built on first use and then shared by every
+device of that model.
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .const import ACCUMULATED_SENSORS, DEVICE_SENSORS
+
+SCHEMA_FILE = Path(__file__).with_name("sensorlinx-connect-api.json")
+
+# Device types reported by the API whose schema uses another model name
+DEVICE_TYPE_ALIASES = {
+    "WFS": "FLW",  # Wi-Fi flow & temperature sensor
+    "WPS": "PRS",  # Wi-Fi pressure & temperature sensor
+}
+
+# Keys holding counters that only grow
+TOTAL_INCREASING_KEYS = frozenset(
+    key for sensors in ACCUMULATED_SENSORS.values() for key in sensors
+) | {"accumulated", "flowCounter", "flowCount"}
+
+
+@dataclass(frozen=True, slots=True)
+class SensorDescriptor:
+    """Immutable description of one sensor of a device model."""
+
+    key: str
+    name: str
+    unit: Optional[str] = None
+    device_class: Optional[str] = None
+    state_class: Optional[str] = None
+    icon: Optional[str] = None
+
+
+def _load_model_schemas() -> Dict[str, Dict[str, Any]]:
+    """Return the schema properties of each model keyed by model prefix."""
+    try:
+        spec = json.loads(SCHEMA_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+    models = {}
+    for name, schema in spec.get("components", {}).get("schemas", {}).items():
+        prefix, _, version = name.partition("-")
+        if version and "properties" in schema:
+            models[prefix] = schema["properties"]
+    return models
+
+
+_MODEL_SCHEMAS = _load_model_schemas()
+
+
+def _humanize(key: str) -> str:
+    """Turn a camelCase key into a title."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", key).title()
+
+
+def _describe_property(key: str, prop: Dict[str, Any]) -> SensorDescriptor:
+    """Derive a descriptor from a schema property."""
+    lowered = key.lower()
+    unit = device_class = icon = None
+
+    if prop.get("minimum") == 0 and prop.get("maximum") == 1:
+        # On/off flags
+        return SensorDescriptor(key=key, name=prop.get("title") or _humanize(key))
+
+    state_class = "total_increasing" if key in TOTAL_INCREASING_KEYS else "measurement"
+    if "temp" in lowered:
+        unit, device_class, icon = "°F", "temperature", "mdi:thermometer"
+    elif "humidity" in lowered:
+        unit, device_class, icon = "%", "humidity", "mdi:water-percent"
+    elif "pressure" in lowered or "psi" in lowered:
+        unit, device_class, icon = "psi", "pressure", "mdi:gauge"
+    elif "volume" in lowered:
+        unit, device_class, icon = "gal", "water", "mdi:water"
+    elif ("flow" in lowered or "gpm" in lowered) and state_class == "measurement":
+        unit, device_class, icon = "gal/min", "volume_flow_rate", "mdi:pump"
+    elif "percentage" in lowered:
+        unit, icon = "%", "mdi:percent"
+
+    return SensorDescriptor(
+        key=key,
+        name=prop.get("title") or _humanize(key),
+        unit=unit,
+        device_class=device_class,
+        state_class=state_class,
+        icon=icon,
+    )
+
+
+def _model_key(device_type: Optional[str]) -> Optional[str]:
+    """Return the schema model prefix of a device type."""
+    if not device_type:
+        return None
+    return DEVICE_TYPE_ALIASES.get(device_type, device_type)
+
+
+def _accumulated_sensors(device_type: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Return the accumulated sensor definitions of a device type."""
+    return ACCUMULATED_SENSORS.get(device_type) or ACCUMULATED_SENSORS.get(_model_key(device_type), {})
+
+
+@lru_cache(maxsize=None)
+def get_descriptors(device_type: Optional[str]) -> Tuple[SensorDescriptor, ...]:
+    """Return the sensor descriptors of a device type.
+
+    Scalar numeric schema properties become descriptors; nested objects
+    and arrays are skipped, as are the totals read from the accumulated
+    endpoint, which get_accumulated_descriptors() describes. Definitions
+    in const.DEVICE_SENSORS override the schema and come first so
+    existing entity names stay stable.
+    """
+    descriptors: Dict[str, SensorDescriptor] = {}
+
+    for key, config in DEVICE_SENSORS.get(device_type, {}).items():
+        descriptors[key] = SensorDescriptor(
+            key=key,
+            name=config["name"],
+            unit=config.get("unit") or None,
+            device_class=config.get("device_class"),
+            state_class=config.get("state_class"),
+            icon=config.get("icon"),
+        )
+
+    accumulated = _accumulated_sensors(device_type)
+    for key, prop in _MODEL_SCHEMAS.get(_model_key(device_type), {}).items():
+        if key in descriptors or key in accumulated:
+            continue
+        if prop.get("type") in ("number", "integer"):
+            descriptors[key] = _describe_property(key, prop)
+
+    return tuple(descriptors.values())
+
+
+@lru_cache(maxsize=None)
+def get_accumulated_descriptors(device_type: Optional[str]) -> Tuple[SensorDescriptor, ...]:
+    """Return the accumulated-endpoint sensor descriptors of a device type."""
+    return tuple(
+        SensorDescriptor(
+            key=key,
+            name=config["name"],
+            unit=config.get("unit") or None,
+            device_class=config.get("device_class"),
+            state_class="total_increasing",
+            icon=config.get("icon"),
+        )
+        for key, config in _accumulated_sensors(device_type).items()
+    )
@@ -0,0 +1,50 @@
+"""Diagnostics support for HBX SensorLinx integration."""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "api": {
+            **api.metrics.as_dict(),
+            "circuit_breaker": api.circuit_breaker.state,
+            "scheduler": {"in_flight": api.scheduler.in_flight, "queued": api.scheduler.queued},
+            "single_flight": api.single_flight.stats,
+            "decoder": api.decoder.stats,
+            "cassette": (
+                {"mode": api.cassette.mode, **api.cassette.stats} if api.cassette else None
+            ),
+        },
+        "coordinator": {
+            **coordinator.refresh_metrics.as_dict(),
+            "devices": len(coordinator.data or {}),
+            "served_from_cache": sorted(coordinator.cached),
+            "stale": coordinator.stale,
+            "entity_writes": coordinator.write_stats,
+            "pending_writes": len(coordinator.pending_writes),
+            "derived": (
+                {"devices": len(coordinator.derived.devices), **coordinator.derived.stats}
+                if coordinator.derived
+                else None
+            ),
+        },
+        "writes": coordinator.writer.stats,
+    }
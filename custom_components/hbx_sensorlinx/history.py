@@ -0,0 +1,163 @@
+"""History backfill for HBX SensorLinx integration."""
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .api import SensorLinxAPI, history_endpoint
+from .const import HISTORY_TIME_KEYS
+from .scheduler import PRIORITY_BACKGROUND
+
+_LOGGER = logging.getLogger(__name__)
+
+# The history endpoint rejects ranges longer than 30 days
+MAX_HISTORY_WINDOW = 30 * 24 * 3600  # seconds
+
+Timestamp = Union[int, float, datetime]
+
+
+def to_timestamp(value: Timestamp) -> int:
+    """Return a Unix timestamp in seconds."""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def record_timestamp(record: Dict[str, Any]) -> Optional[float]:
+    """Return the Unix timestamp of a history record in seconds."""
+    for key in HISTORY_TIME_KEYS:
+        value = record.get(key)
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            # Millisecond timestamps are larger than any second timestamp
+            return value / 1000 if value > 1e11 else float(value)
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            # The API reports UTC
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def split_windows(start: int, end: int, window: int = MAX_HISTORY_WINDOW) -> List[Tuple[int, int]]:
+    """Split [start, end) into consecutive ranges no longer than window."""
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def choose_sample(duration: int, point_budget: Optional[int], native_interval: float) -> Optional[int]:
+    """Return the sample value keeping a window within the point budget.
+
+    Returns None, meaning unsampled, when the raw records of the window are
+    expected to fit the budget anyway.
+    """
+    if not point_budget:
+        return None
+    if math.ceil(duration / native_interval) <= point_budget:
+        return None
+    return point_budget
+
+
+class HistoryBackfill:
+    """Stream device history over arbitrary time ranges.
+
+    Ranges are split into windows the endpoint accepts. The pages of a
+    window are fetched through a bounded sliding window at background
+    priority, and records are yielded as they arrive so memory stays
+    bounded by the page size times the page concurrency.
+    """
+
+    def __init__(
+        self,
+        api: SensorLinxAPI,
+        page_size: int = 1000,
+        page_concurrency: int = 4,
+        device_concurrency: int = 4,
+        point_budget: Optional[int] = None,
+        native_interval: float = 60.0,
+    ):
+        """Initialize the backfill engine.
+
+        point_budget caps the records requested per window through the
+        sample parameter; native_interval is the expected spacing of raw
+        records in seconds, used to decide whether sampling is needed.
+        """
+        self.api = api
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        self.device_concurrency = device_concurrency
+        self.point_budget = point_budget
+        self.native_interval = native_interval
+
+    async def iter_device(
+        self, sync_code: str, start: Timestamp, end: Timestamp
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the history records of one device in time order.
+
+        Raises IncompletePagesError after the records received when a page
+        of the range cannot be fetched.
+        """
+        for window_start, window_end in split_windows(to_timestamp(start), to_timestamp(end)):
+            sample = choose_sample(window_end - window_start, self.point_budget, self.native_interval)
+            params = {"sample": sample} if sample else None
+
+            async for response in self.api.iter_pages(
+                history_endpoint(sync_code, window_start, window_end),
+                params=params,
+                limit=self.page_size,
+                priority=PRIORITY_BACKGROUND,
+                concurrency=self.page_concurrency,
+            ):
+                for record in response["items"]:
+                    yield record
+
+    async def iter_devices(
+        self,
+        sync_codes: Iterable[str],
+        start: Timestamp,
+        end: Timestamp,
+        failed: Optional[Set[str]] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (syncCode, record) pairs for several devices.
+
+        Up to device_concurrency devices are backfilled at once. Records of
+        one device stay in time order but devices are interleaved. A device
+        whose backfill fails is logged and added to failed, when given; its
+        records may have gaps.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.page_size)
+        semaphore = asyncio.Semaphore(self.device_concurrency)
+        done = object()
+
+        async def backfill(sync_code: str) -> None:
+            try:
+                async with semaphore:
+                    async for record in self.iter_device(sync_code, start, end):
+                        await queue.put((sync_code, record))
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.error("History backfill of %s failed: %s", sync_code, err)
+                if failed is not None:
+                    failed.add(sync_code)
+            finally:
+                await queue.put(done)
+
+        tasks = [asyncio.ensure_future(backfill(sync_code)) for sync_code in sync_codes]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,201 @@
+"""Import SensorLinx history into Home Assistant long-term statistics."""
+import logging
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    HISTORY_IMPORT_DEFAULT_DAYS,
+    HISTORY_IMPORT_STORAGE_KEY,
+    HISTORY_IMPORT_STORAGE_VERSION,
+)
+from .history import HistoryBackfill, record_timestamp, split_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+def statistic_id(sync_code: str, sensor_key: str) -> str:
+    """Return the external statistic id of a device sensor."""
+    object_id = re.sub(r"[^a-z0-9_]", "_", f"{sync_code}_{sensor_key}".lower())
+    return f"{DOMAIN}:{object_id}"
+
+
+class HourlyAggregator:
+    """Aggregate the records of one device into hourly mean/min/max.
+
+    Values are bucketed by hour as they arrive, in any order. Buckets are
+    reduced with the min/max/fsum builtins when the rows are taken, so
+    there is one reduction per sensor and hour instead of per-sample
+    bookkeeping.
+    """
+
+    def __init__(self, sensor_keys: List[str]):
+        """Initialize the aggregator."""
+        self.sensor_keys = sensor_keys
+        self._hours: Dict[int, Dict[str, List[float]]] = {}
+
+    def add(self, timestamp: float, record: Dict[str, Any]) -> None:
+        """Add a record."""
+        hour = int(timestamp) - int(timestamp) % HOUR
+        values = self._hours.get(hour)
+        if values is None:
+            values = self._hours[hour] = {key: [] for key in self.sensor_keys}
+
+        for key in self.sensor_keys:
+            value = record.get(key)
+            if value is None:
+                continue
+            try:
+                values[key].append(float(value))
+            except (TypeError, ValueError):
+                continue
+
+    def pop_rows(self) -> Dict[str, List[Tuple[int, float, float, float]]]:
+        """Reduce the buckets into rows in hour order and clear them."""
+        rows: Dict[str, List[Tuple[int, float, float, float]]] = {}
+        for hour in sorted(self._hours):
+            for key, values in self._hours[hour].items():
+                if values:
+                    rows.setdefault(key, []).append(
+                        (hour, math.fsum(values) / len(values), min(values), max(values))
+                    )
+        self._hours.clear()
+        return rows
+
+
+class HistoryImporter:
+    """Backfill device history into external statistics incrementally.
+
+    History is fetched in batches of batch_hours. The end of a batch is
+    stored per device once the batch was fetched completely, whether or
+    not it held any records, so a repeated import only fetches what is new
+    and retries anything a failure left out.
+    """
+
+    def __init__(self, hass: HomeAssistant, backfill: HistoryBackfill, batch_hours: int = 24 * 7):
+        """Initialize the importer."""
+        self.hass = hass
+        self.backfill = backfill
+        self.batch_hours = batch_hours
+        self._store = Store(hass, HISTORY_IMPORT_STORAGE_VERSION, HISTORY_IMPORT_STORAGE_KEY)
+        self._cursors: Dict[str, int] = {}
+
+    async def async_load(self) -> None:
+        """Load the import cursors."""
+        self._cursors = await self._store.async_load() or {}
+
+    def cursor(self, sync_code: str) -> Optional[int]:
+        """Return the end of the last imported hour of a device."""
+        return self._cursors.get(sync_code)
+
+    async def async_import(
+        self,
+        devices: Dict[str, Dict[str, Any]],
+        start: Optional[datetime],
+        end: datetime,
+    ) -> int:
+        """Import history for the given devices and return the rows written.
+
+        devices maps each syncCode to {"name": ..., "sensors": {key:
+        SensorDescriptor}}. Devices resume from their cursor when
+        it is later than start. Without a start, devices that were never
+        imported go back HISTORY_IMPORT_DEFAULT_DAYS. Only complete hours
+        are written.
+        """
+        end_ts = int(end.timestamp())
+        end_ts -= end_ts % HOUR
+        if start is None:
+            start_ts = end_ts - HISTORY_IMPORT_DEFAULT_DAYS * 24 * HOUR
+        else:
+            start_ts = int(start.timestamp())
+        # Statistics rows start on the hour, as the recorder's own
+        start_ts -= start_ts % HOUR
+
+        aggregators: Dict[str, HourlyAggregator] = {}
+        windows: Dict[Tuple[int, int], List[str]] = {}
+        for sync_code, device in devices.items():
+            keys = list(device["sensors"])
+            if not keys:
+                continue
+            cursor = self._cursors.get(sync_code)
+            if start is None and cursor is not None:
+                device_start = cursor
+            else:
+                device_start = max(start_ts, cursor or 0)
+            if device_start >= end_ts:
+                continue
+            aggregators[sync_code] = HourlyAggregator(keys)
+            windows.setdefault((device_start, end_ts), []).append(sync_code)
+
+        written = 0
+        # A failed device may have gaps, it resumes from its old cursor on
+        # the next import and skips the rest of this one
+        failed: Set[str] = set()
+        for (window_start, window_end), sync_codes in windows.items():
+            # Rows are written once their batch was fetched, records of a
+            # batch may arrive in any order
+            for batch_start, batch_end in split_windows(
+                window_start, window_end, self.batch_hours * HOUR
+            ):
+                sync_codes = [sync_code for sync_code in sync_codes if sync_code not in failed]
+                if not sync_codes:
+                    break
+                async for sync_code, record in self.backfill.iter_devices(
+                    sync_codes, batch_start, batch_end, failed
+                ):
+                    timestamp = record_timestamp(record)
+                    if timestamp is None or timestamp < batch_start or timestamp >= batch_end:
+                        continue
+                    aggregators[sync_code].add(timestamp, record)
+
+                written += self._flush(devices, aggregators)
+                for sync_code in sync_codes:
+                    if sync_code not in failed:
+                        self._cursors[sync_code] = max(self._cursors.get(sync_code, 0), batch_end)
+                # Keep progress if a long import is interrupted
+                self._store.async_delay_save(lambda: self._cursors, 10)
+
+        await self._store.async_save(self._cursors)
+        return written
+
+    def _flush(
+        self,
+        devices: Dict[str, Dict[str, Any]],
+        aggregators: Dict[str, HourlyAggregator],
+    ) -> int:
+        """Write the aggregated hours, one recorder call per statistic."""
+        written = 0
+        for sync_code, aggregator in aggregators.items():
+            device = devices[sync_code]
+            for key, rows in aggregator.pop_rows().items():
+                descriptor = device["sensors"][key]
+                metadata = StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=f"{device['name']} {descriptor.name}",
+                    source=DOMAIN,
+                    statistic_id=statistic_id(sync_code, key),
+                    unit_of_measurement=descriptor.unit,
+                )
+                statistics = [
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour),
+                        mean=mean,
+                        min=minimum,
+                        max=maximum,
+                    )
+                    for hour, mean, minimum, maximum in rows
+                ]
+                async_add_external_statistics(self.hass, metadata, statistics)
+                written += len(statistics)
+        return written
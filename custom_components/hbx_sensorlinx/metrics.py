@@ -0,0 +1,134 @@
+"""Request and refresh instrumentation for HBX SensorLinx integration.
+
+Recording is cheap enough for every request: counters are preallocated,
+histograms are fixed bucket lists and nothing is formatted until a
+snapshot is taken with as_dict().
+"""
+from bisect import bisect_left
+from typing import Any, Dict, Optional, Tuple
+
+# Upper bounds of the latency and duration histogram buckets in seconds,
+# the last bucket counts everything slower
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Endpoint path segments kept in route labels, anything else is an id
+ROUTE_SEGMENTS = frozenset(
+    {"", "v1", "devices", "available", "model", "history", "accumulated", "system", "status"}
+)
+
+
+def endpoint_route(endpoint: str) -> str:
+    """Return the endpoint with ids replaced, e.g. /v1/devices/{}."""
+    return "/".join(
+        segment if segment in ROUTE_SEGMENTS else "{}" for segment in endpoint.split("/")
+    )
+
+
+class Histogram:
+    """Fixed bucket histogram."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        """Initialize the histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "max": round(self.max, 4),
+            "buckets": buckets,
+        }
+
+
+class ApiMetrics:
+    """Counters of the requests sent by one API client."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.latency: Dict[str, Histogram] = {}
+        self.status: Dict[int, int] = {}
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.rejected = 0
+        self.bytes_received = 0
+
+    def record(self, route: str, status: int, elapsed: float, received: int) -> None:
+        """Count a response."""
+        histogram = self.latency.get(route)
+        if histogram is None:
+            histogram = self.latency[route] = Histogram()
+        histogram.observe(elapsed)
+        self.status[status] = self.status.get(status, 0) + 1
+        self.bytes_received += received
+
+    def record_error(self, route: str, elapsed: float) -> None:
+        """Count a request that got no response."""
+        histogram = self.latency.get(route)
+        if histogram is None:
+            histogram = self.latency[route] = Histogram()
+        histogram.observe(elapsed)
+        self.errors += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters for diagnostics."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "rejected_by_breaker": self.rejected,
+            "bytes_received": self.bytes_received,
+            "status": {str(status): count for status, count in sorted(self.status.items())},
+            "latency": {route: histogram.as_dict() for route, histogram in sorted(self.latency.items())},
+        }
+
+
+class RefreshMetrics:
+    """Counters of coordinator refreshes."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.duration = Histogram()
+        self.refreshes = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self.last_requests = 0
+        self.last_devices = 0
+
+    def record(self, duration: float, requests: int, devices: int, failed: bool) -> None:
+        """Count a refresh."""
+        self.duration.observe(duration)
+        self.refreshes += 1
+        if failed:
+            self.failures += 1
+        self.last_duration = duration
+        self.last_requests = requests
+        self.last_devices = devices
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters for diagnostics."""
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+            "last_requests": self.last_requests,
+            "last_devices": self.last_devices,
+            "duration": self.duration.as_dict(),
+        }
@@ -0,0 +1,68 @@
+"""Adaptive per-device polling for HBX SensorLinx integration."""
+from typing import Any, Dict, Iterable, List
+
+# Non-zero values of these keys mean the device is calling for heat/cool
+ACTIVE_KEYS = ("demand1", "demand2", "demands")
+
+
+def is_active(payload: Dict[str, Any]) -> bool:
+    """Return True if the device reports an active demand."""
+    for key in ACTIVE_KEYS:
+        value = payload.get(key)
+        if value:
+            try:
+                if float(value) > 0:
+                    return True
+            except (TypeError, ValueError):
+                continue
+    return False
+
+
+class PollScheduler:
+    """Track when each device is next due for a poll.
+
+    Devices that are changing or have an active demand are polled every
+    base_interval. Static devices back off by `backoff` on each unchanged
+    poll up to max_interval, and disconnected devices go straight to
+    max_interval.
+    """
+
+    def __init__(self, base_interval: float, max_interval: float, backoff: float = 2.0):
+        """Initialize the scheduler."""
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.backoff = backoff
+        self._interval: Dict[str, float] = {}
+        self._next_due: Dict[str, float] = {}
+
+    def due(self, now: float) -> List[str]:
+        """Return the devices due for a poll."""
+        return [device_id for device_id, due in self._next_due.items() if due <= now]
+
+    def interval(self, device_id: str) -> float:
+        """Return the current poll interval of a device."""
+        return self._interval.get(device_id, self.base_interval)
+
+    def record(self, device_id: str, payload: Dict[str, Any], changed: bool, now: float) -> None:
+        """Schedule the next poll of a device from its latest payload."""
+        if not payload.get("connected", False):
+            interval = self.max_interval
+        elif changed or is_active(payload):
+            interval = self.base_interval
+        else:
+            interval = min(self.max_interval, self.interval(device_id) * self.backoff)
+
+        self._interval[device_id] = interval
+        # Tolerance so timer jitter does not push a device back a whole tick
+        self._next_due[device_id] = now + interval - self.base_interval / 10
+
+    def mark_due(self, device_id: str, now: float) -> None:
+        """Poll a device again on the next tick."""
+        self._next_due[device_id] = now
+
+    def retain(self, device_ids: Iterable[str]) -> None:
+        """Stop tracking every device not in device_ids."""
+        keep = set(device_ids)
+        for device_id in [device_id for device_id in self._next_due if device_id not in keep]:
+            self._interval.pop(device_id, None)
+            del self._next_due[device_id]
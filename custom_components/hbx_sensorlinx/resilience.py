@@ -0,0 +1,116 @@
+"""Retry and circuit breaker helpers for the HBX SensorLinx API client."""
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        """Initialize the policy."""
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the delay before retry number `attempt` (starting at 0).
+
+        A server supplied Retry-After wins over the computed backoff but is
+        still capped at backoff_max.
+        """
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Stop sending requests after repeated failures.
+
+    After failure_threshold consecutive failures the breaker opens and
+    rejects requests for reset_timeout seconds. It then lets up to
+    half_open_max probe requests through; a successful probe closes the
+    breaker and a failed one opens it again. A probe that ends without
+    either, because it was cancelled or throttled, must be released.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        half_open_max: int = 1,
+    ):
+        """Initialize the breaker closed."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state."""
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return STATE_HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_OPEN:
+            return False
+
+        if self._state == STATE_OPEN:
+            self._state = STATE_HALF_OPEN
+            self._probes = 0
+        if self._probes >= self.half_open_max:
+            return False
+        self._probes += 1
+        return True
+
+    def release_probe(self) -> None:
+        """Free the slot of a probe that ended without success or failure."""
+        if self._state == STATE_HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        """Record a request that reached a healthy server."""
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request."""
+        self._failures += 1
+        if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = STATE_OPEN
+            self._opened_at = time.monotonic()
+            self._probes = 0
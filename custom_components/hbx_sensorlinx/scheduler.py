@@ -0,0 +1,147 @@
+"""Request scheduling for the HBX SensorLinx API client."""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+# Lower values are served first
+PRIORITY_CONTROL = 0
+PRIORITY_POLL = 1
+PRIORITY_BACKGROUND = 2
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize the bucket full."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token.
+
+        Returns 0 when a token was taken, otherwise the number of seconds
+        until one becomes available.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class RequestScheduler:
+    """Admit requests under a concurrency cap and a shared rate budget.
+
+    Waiting requests are admitted in priority order, so control writes
+    overtake queued background polling.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        """Initialize the scheduler."""
+        self.max_concurrency = max_concurrency
+        self._bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of admitted requests."""
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for admission."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def slot(self, priority: int = PRIORITY_POLL) -> "_Slot":
+        """Return an async context manager holding a request slot."""
+        return _Slot(self, priority)
+
+    async def acquire(self, priority: int = PRIORITY_POLL) -> None:
+        """Wait until a request of the given priority may start."""
+        if not self._waiters and self._try_admit():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before being cancelled, hand the slot back
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Release a slot taken by acquire."""
+        self._active -= 1
+        self._dispatch()
+
+    def _try_admit(self) -> bool:
+        """Admit a request immediately if capacity and budget allow."""
+        if self._active >= self.max_concurrency:
+            return False
+        if self._bucket and self._bucket.try_acquire():
+            return False
+        self._active += 1
+        return True
+
+    def _dispatch(self) -> None:
+        """Admit waiting requests in priority order."""
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self.max_concurrency:
+                return
+
+            if self._bucket:
+                delay = self._bucket.try_acquire()
+                if delay:
+                    if self._timer is None:
+                        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                    return
+
+            heapq.heappop(self._waiters)
+            self._active += 1
+            future.set_result(None)
+
+    def _on_timer(self) -> None:
+        """Retry admission once the bucket has refilled."""
+        self._timer = None
+        self._dispatch()
+
+
+class _Slot:
+    """Async context manager for a single scheduler slot."""
+
+    __slots__ = ("_scheduler", "_priority")
+
+    def __init__(self, scheduler: RequestScheduler, priority: int):
+        self._scheduler = scheduler
+        self._priority = priority
+
+    async def __aenter__(self) -> None:
+        await self._scheduler.acquire(self._priority)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._scheduler.release()
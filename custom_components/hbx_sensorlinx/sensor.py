@@ -1,7 +1,6 @@
 """Sensor platform for HBX SensorLinx integration."""
 import logging
-from typing import Optional, Dict, Any
-from datetime import timedelta
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple
 
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -9,14 +8,12 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.const import (
     CONF_API_KEY,
     CONF_URL,
@@ -25,8 +22,18 @@ from homeassistant.const import (
     PERCENTAGE,
 )
 
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, MANUFACTURER
-from .api import SensorLinxAPI, SensorLinxDevice
+from .const import (
+    DOMAIN,
+    CONF_DIAGNOSTIC_SENSORS,
+    DEFAULT_DIAGNOSTIC_SENSORS,
+    DEFAULT_SCAN_INTERVAL,
+    MANUFACTURER,
+)
+from .api import SensorLinxDevice
+from .derived import DEGREE_HOURS_KEY, get_derived_descriptors
+from .descriptors import SensorDescriptor
+from .snapshot import DeviceSnapshot, slot_index
+from .coordinator import SensorLinxAccumulatedCoordinator, SensorLinxDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,25 +44,150 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor platform."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    known: Set[str] = set()
     
-    entities = []
-    
-    # Create sensors for each device
-    for device_id, device_data in coordinator.data.items():
-        device = SensorLinxDevice(device_data)
-        sensor_definitions = device.get_sensor_definitions()
-        
-        for sensor_key, sensor_config in sensor_definitions.items():
-            entities.append(
-                SensorLinxSensor(
-                    coordinator=coordinator,
-                    device=device,
-                    sensor_key=sensor_key,
-                    sensor_config=sensor_config,
+    @callback
+    def _async_discover() -> None:
+        """Add entities for new devices and retire removed ones."""
+        data = coordinator.data or {}
+        new = data.keys() - known
+        if new:
+            _LOGGER.debug("Adding entities for %d devices", len(new))
+            entities = []
+            for device_id in new:
+                device_entities = _create_entities(coordinator, data[device_id])
+                if not device_entities:
+                    # Nothing to show, stop fetching it until a reload
+                    coordinator.entityless.add(device_id)
+                entities.extend(device_entities)
+            async_add_entities(entities)
+            known.update(new)
+            
+        # Only a complete device listing proves a device was removed, a
+        # device that merely fails to fetch keeps its entities
+        if coordinator.listed is None:
+            return
+        removed = known - coordinator.listed - data.keys()
+        if not removed:
+            return
+        registry = dr.async_get(hass)
+        for device_id in removed:
+            device_entry = registry.async_get_device(identifiers={(DOMAIN, device_id)})
+            if device_entry is not None:
+                _LOGGER.info("Removing device %s, no longer in the account", device_id)
+                registry.async_update_device(
+                    device_entry.id, remove_config_entry_id=config_entry.entry_id
                 )
-            )
+        known.difference_update(removed)
+        
+    _async_discover()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_discover))
     
-    async_add_entities(entities)
+    if {**config_entry.data, **config_entry.options}.get(
+        CONF_DIAGNOSTIC_SENSORS, DEFAULT_DIAGNOSTIC_SENSORS
+    ):
+        async_add_entities(
+            SensorLinxDiagnosticSensor(coordinator, config_entry, descriptor, value_fn)
+            for descriptor, value_fn in DIAGNOSTIC_SENSORS
+        )
+
+
+def _create_entities(
+    coordinator: SensorLinxDataUpdateCoordinator, snapshot: DeviceSnapshot
+) -> List[SensorEntity]:
+    """Return the entities of one device."""
+    device = SensorLinxDevice(snapshot.as_dict())
+    entities: List[SensorEntity] = [
+        SensorLinxSensor(coordinator=coordinator, device=device, descriptor=descriptor)
+        for descriptor in device.get_sensor_definitions().values()
+    ]
+    entities.extend(
+        SensorLinxAccumulatedSensor(
+            coordinator=coordinator.accumulated, device=device, descriptor=descriptor
+        )
+        for descriptor in coordinator.accumulated.accumulated_keys(snapshot)
+    )
+    if coordinator.derived is not None:
+        entities.extend(
+            SensorLinxDerivedSensor(coordinator=coordinator, device=device, descriptor=descriptor)
+            for descriptor in get_derived_descriptors(snapshot.device_type)
+        )
+    return entities
+
+
+# Per config entry instrumentation, see metrics.py
+DIAGNOSTIC_SENSORS: Tuple[Tuple[SensorDescriptor, Callable[[SensorLinxDataUpdateCoordinator], Any]], ...] = (
+    (
+        SensorDescriptor(
+            key="refresh_duration",
+            name="Refresh Duration",
+            unit="s",
+            device_class="duration",
+            state_class="measurement",
+            icon="mdi:timer-outline",
+        ),
+        lambda coordinator: coordinator.refresh_metrics.last_duration,
+    ),
+    (
+        SensorDescriptor(
+            key="refresh_requests",
+            name="Requests Per Refresh",
+            state_class="measurement",
+            icon="mdi:swap-vertical",
+        ),
+        lambda coordinator: coordinator.refresh_metrics.last_requests,
+    ),
+    (
+        SensorDescriptor(
+            key="entity_writes",
+            name="Entity Writes Per Refresh",
+            state_class="measurement",
+            icon="mdi:pencil",
+        ),
+        lambda coordinator: coordinator.write_stats["last_notified"],
+    ),
+    (
+        SensorDescriptor(
+            key="api_requests",
+            name="API Requests",
+            state_class="total_increasing",
+            icon="mdi:counter",
+        ),
+        lambda coordinator: coordinator.api.metrics.requests,
+    ),
+    (
+        SensorDescriptor(
+            key="api_errors",
+            name="API Errors",
+            state_class="total_increasing",
+            icon="mdi:alert-circle-outline",
+        ),
+        lambda coordinator: coordinator.api.metrics.errors,
+    ),
+    (
+        SensorDescriptor(
+            key="api_bytes_received",
+            name="API Bytes Received",
+            unit="B",
+            device_class="data_size",
+            state_class="total_increasing",
+            icon="mdi:download",
+        ),
+        lambda coordinator: coordinator.api.metrics.bytes_received,
+    ),
+)
+
+
+def _device_info(device: SensorLinxDevice) -> DeviceInfo:
+    """Return device info for grouping sensors under devices."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, device.id)},
+        name=device.display_name,
+        manufacturer=MANUFACTURER,
+        model=device.device_type,
+        sw_version=str(device.firmware_version),
+        configuration_url=f"https://connect.sensorlinx.co/devices/{device.id}",
+    )
 
 
 class SensorLinxSensor(CoordinatorEntity, SensorEntity):
@@ -63,98 +195,207 @@ class SensorLinxSensor(CoordinatorEntity, SensorEntity):
     
     def __init__(
         self,
-        coordinator: DataUpdateCoordinator,
+        coordinator: SensorLinxDataUpdateCoordinator,
         device: SensorLinxDevice,
-        sensor_key: str,
-        sensor_config: Dict[str, Any],
+        descriptor: SensorDescriptor,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        # Only written when this key or its device changes
+        super().__init__(coordinator, context=(device.id, descriptor.key))
         
         self._device = device
-        self._sensor_key = sensor_key
-        self._sensor_config = sensor_config
+        self._device_id = device.id
+        self._sensor_key = descriptor.key
+        self._descriptor = descriptor
+        self._slot = slot_index(device.device_type)[descriptor.key]
         
         # Generate unique ID
-        self._attr_unique_id = f"{device.id}_{sensor_key}"
+        self._attr_unique_id = f"{device.id}_{descriptor.key}"
         
         # Set entity attributes
-        self._attr_name = f"{device.display_name} {sensor_config['name']}"
-        self._attr_native_unit_of_measurement = sensor_config.get("unit")
-        self._attr_device_class = sensor_config.get("device_class")
-        self._attr_state_class = sensor_config.get("state_class")
-        self._attr_icon = sensor_config.get("icon")
+        self._attr_name = f"{device.display_name} {descriptor.name}"
+        self._attr_native_unit_of_measurement = descriptor.unit
+        self._attr_device_class = descriptor.device_class
+        self._attr_state_class = descriptor.state_class
+        self._attr_icon = descriptor.icon
         
         # Device info for grouping sensors under devices
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device.id)},
-            name=device.display_name,
-            manufacturer=MANUFACTURER,
-            model=device.device_type,
-            sw_version=str(device.firmware_version),
-            configuration_url=f"https://connect.sensorlinx.co/devices/{device.id}",
-        )
+        self._attr_device_info = _device_info(device)
+        
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when this value or its device changed."""
+        if self.coordinator.has_changed(self.coordinator_context):
+            super()._handle_coordinator_update()
+        
+    async def async_update(self) -> None:
+        """Refresh only this sensor's device."""
+        await self.coordinator.async_refresh_devices([self._device_id])
         
     @property
     def native_value(self) -> Optional[float]:
         """Return the state of the sensor."""
-        if self.coordinator.data and self._device.id in self.coordinator.data:
-            device_data = self.coordinator.data[self._device.id]
-            value = device_data.get(self._sensor_key)
+        snapshot = self.coordinator.data.get(self._device_id) if self.coordinator.data else None
+        if snapshot is None:
+            return None
+        return snapshot.values[self._slot]
+        
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        if not self.coordinator.last_update_success or not self.coordinator.data:
+            return False
+        snapshot = self.coordinator.data.get(self._device_id)
+        return snapshot is not None and snapshot.connected
+        
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return additional state attributes."""
+        snapshot = self.coordinator.data.get(self._device_id) if self.coordinator.data else None
+        if snapshot is None:
+            return {}
             
-            if value is not None:
-                try:
-                    return float(value)
-                except (ValueError, TypeError):
-                    return value
+        attributes = {
+            "device_type": snapshot.device_type,
+            "firmware_version": snapshot.firmware_version,
+            "connected_at": snapshot.connected_at,
+            "zone": snapshot.get("zone"),
+            "priority": snapshot.get("priority"),
+        }
+        if self.coordinator.stale:
+            attributes["stale"] = True
+            attributes["snapshot_time"] = self.coordinator.snapshot_time
+        if self._device_id in self.coordinator.cached:
+            attributes["data_age"] = self.coordinator.data_age(self._device_id)
+        return attributes
+
+
+class SensorLinxAccumulatedSensor(CoordinatorEntity, SensorEntity):
+    """Running energy or volume total of a SensorLinx device."""
+    
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    
+    def __init__(
+        self,
+        coordinator: SensorLinxAccumulatedCoordinator,
+        device: SensorLinxDevice,
+        descriptor: SensorDescriptor,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        
+        self._device = device
+        self._sensor_key = descriptor.key
+        
+        self._attr_unique_id = f"{device.id}_{descriptor.key}_accumulated"
+        self._attr_name = f"{device.display_name} {descriptor.name}"
+        self._attr_native_unit_of_measurement = descriptor.unit
+        self._attr_device_class = descriptor.device_class
+        self._attr_icon = descriptor.icon
+        self._attr_device_info = _device_info(device)
+        
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the running total."""
+        if self.coordinator.data and self._device.id in self.coordinator.data:
+            return self.coordinator.data[self._device.id].get(self._sensor_key)
         return None
         
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
+        """Return True once the total has been read."""
         return (
             self.coordinator.last_update_success
-            and self.coordinator.data
+            and bool(self.coordinator.data)
             and self._device.id in self.coordinator.data
-            and self.coordinator.data[self._device.id].get("connected", False)
         )
+
+
+class SensorLinxDerivedSensor(CoordinatorEntity, SensorEntity):
+    """Rolling statistic, duty cycle or degree-hours of a SensorLinx device."""
+    
+    def __init__(
+        self,
+        coordinator: SensorLinxDataUpdateCoordinator,
+        device: SensorLinxDevice,
+        descriptor: SensorDescriptor,
+    ) -> None:
+        """Initialize the sensor."""
+        # Only written when the rounded value or its device changes
+        super().__init__(coordinator, context=(device.id, descriptor.key))
+        
+        self._device_id = device.id
+        self._sensor_key = descriptor.key
+        
+        self._attr_unique_id = f"{device.id}_{descriptor.key}_derived"
+        self._attr_name = f"{device.display_name} {descriptor.name}"
+        self._attr_native_unit_of_measurement = descriptor.unit
+        self._attr_device_class = descriptor.device_class
+        self._attr_state_class = descriptor.state_class
+        self._attr_icon = descriptor.icon
+        self._attr_device_info = _device_info(device)
+        
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when this value or its device changed."""
+        if self.coordinator.has_changed(self.coordinator_context):
+            super()._handle_coordinator_update()
+        
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the derived value."""
+        return self.coordinator.derived.value(self._device_id, self._sensor_key)
+        
+    @property
+    def available(self) -> bool:
+        """Return True once the value has been computed."""
+        return self.coordinator.last_update_success and self.native_value is not None
         
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return additional state attributes."""
-        if self.coordinator.data and self._device.id in self.coordinator.data:
-            device_data = self.coordinator.data[self._device.id]
-            return {
-                "device_type": device_data.get("deviceType"),
-                "firmware_version": device_data.get("firmVer"),
-                "connected_at": device_data.get("connectedAt"),
-                "zone": device_data.get("zone"),
-                "priority": device_data.get("priority"),
-            }
-        return {}
-
-
-class SensorLinxDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching data from the API."""
+        """Return the window the value covers."""
+        derived = self.coordinator.derived
+        if self._sensor_key == DEGREE_HOURS_KEY:
+            return {"window_hours": derived.degree_window / 3600, "base_temperature": derived.degree_base}
+        return {"window_minutes": derived.window / 60}
+
+
+class SensorLinxDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Request and refresh statistics of a config entry."""
+    
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
     
     def __init__(
         self,
-        hass: HomeAssistant,
-        api: SensorLinxAPI,
-        update_interval: timedelta,
+        coordinator: SensorLinxDataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        descriptor: SensorDescriptor,
+        value_fn: Callable[[SensorLinxDataUpdateCoordinator], Any],
     ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=update_interval,
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        
+        self._value_fn = value_fn
+        
+        self._attr_unique_id = f"{config_entry.entry_id}_{descriptor.key}"
+        self._attr_name = f"SensorLinx {descriptor.name}"
+        self._attr_native_unit_of_measurement = descriptor.unit
+        self._attr_device_class = descriptor.device_class
+        self._attr_state_class = descriptor.state_class
+        self._attr_icon = descriptor.icon
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=config_entry.title,
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
         )
-        self.api = api
-        
-    async def _async_update_data(self) -> Dict[str, Any]:
-        """Fetch data from API endpoint."""
-        try:
-            return await self.api.get_all_device_data()
-        except Exception as err:
-            raise UpdateFailed(f"Error communicating with API: {err}")
+        
+    @property
+    def available(self) -> bool:
+        """Return True, the statistics exist even when refreshes fail."""
+        return True
+        
+    @property
+    def native_value(self) -> Any:
+        """Return the statistic."""
+        return self._value_fn(self.coordinator)
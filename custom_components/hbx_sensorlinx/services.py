@@ -0,0 +1,115 @@
+"""Services for HBX SensorLinx integration."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .api import SensorLinxDevice
+from .const import (
+    DOMAIN,
+    ATTR_END,
+    ATTR_START,
+    ATTR_SYNC_CODES,
+    ATTR_VALUES,
+    SERVICE_IMPORT_HISTORY,
+    SERVICE_SET_VALUES,
+    WRITABLE_FIELDS,
+)
+from .history import HistoryBackfill
+from .history_import import HistoryImporter
+
+_LOGGER = logging.getLogger(__name__)
+
+IMPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SYNC_CODES): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+SET_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SYNC_CODES): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_VALUES): vol.All(
+            vol.Schema(
+                {
+                    vol.Optional(key): vol.Coerce(float)
+                    for key in {key for keys in WRITABLE_FIELDS.values() for key in keys}
+                }
+            ),
+            vol.Length(min=1),
+        ),
+    }
+)
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services once."""
+    if hass.services.has_service(DOMAIN, SERVICE_IMPORT_HISTORY):
+        return
+
+    async def async_import_history(call: ServiceCall) -> None:
+        """Import device history into long-term statistics."""
+        sync_codes = call.data.get(ATTR_SYNC_CODES)
+        end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        start = call.data.get(ATTR_START)
+        if start is not None:
+            start = dt_util.as_utc(start)
+
+        for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+            devices = {}
+            for sync_code, snapshot in (coordinator.data or {}).items():
+                if sync_codes and sync_code not in sync_codes:
+                    continue
+                device = SensorLinxDevice(snapshot.as_dict())
+                devices[sync_code] = {
+                    "name": device.display_name,
+                    "sensors": {
+                        key: descriptor
+                        for key, descriptor in device.get_sensor_definitions().items()
+                        if descriptor.state_class == "measurement"
+                    },
+                }
+            if not devices:
+                continue
+
+            importer = HistoryImporter(hass, HistoryBackfill(coordinator.api))
+            await importer.async_load()
+            rows = await importer.async_import(devices, start, end)
+            _LOGGER.info("Imported %d hourly statistics for %d devices", rows, len(devices))
+
+    async def async_set_values(call: ServiceCall) -> None:
+        """Change device settings."""
+        values = call.data[ATTR_VALUES]
+        writers = {}
+        for coordinator in list(hass.data.get(DOMAIN, {}).values()):
+            for sync_code in call.data[ATTR_SYNC_CODES]:
+                snapshot = (coordinator.data or {}).get(sync_code)
+                if snapshot is not None:
+                    writers[sync_code] = (coordinator.writer, snapshot.device_type)
+
+        unknown = set(call.data[ATTR_SYNC_CODES]) - writers.keys()
+        if unknown:
+            raise HomeAssistantError(f"Unknown SensorLinx devices: {', '.join(sorted(unknown))}")
+        # Checked before anything is applied, a rejected call changes nothing
+        for sync_code, (_, device_type) in writers.items():
+            rejected = values.keys() - set(WRITABLE_FIELDS.get(device_type, ()))
+            if rejected:
+                raise HomeAssistantError(
+                    f"{sync_code} does not accept {', '.join(sorted(rejected))}"
+                )
+
+        for sync_code, (writer, _) in writers.items():
+            await writer.async_write(sync_code, values)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_IMPORT_HISTORY, async_import_history, schema=IMPORT_HISTORY_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_VALUES, async_set_values, schema=SET_VALUES_SCHEMA
+    )
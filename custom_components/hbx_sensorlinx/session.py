@@ -0,0 +1,74 @@
+"""Shared HTTP sessions for HBX SensorLinx integration."""
+import logging
+from typing import Dict, List
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .api import create_session
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SESSION_POOL = f"{DOMAIN}_sessions"
+
+
+class SessionPool:
+    """Reference counted sessions keyed by API base URL.
+
+    Config entries that talk to the same host share one session and its
+    connection pool. A session is closed when its last user releases it.
+    """
+
+    def __init__(self):
+        """Initialize the pool."""
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._users: Dict[str, int] = {}
+
+    @callback
+    def acquire(self, base_url: str) -> aiohttp.ClientSession:
+        """Return the session of base_url and count a user."""
+        base_url = base_url.rstrip("/")
+        session = self._sessions.get(base_url)
+        if session is None or session.closed:
+            session = self._sessions[base_url] = create_session()
+            self._users[base_url] = 0
+        self._users[base_url] += 1
+        return session
+
+    async def release(self, base_url: str) -> None:
+        """Drop a user of base_url, closing the session after the last."""
+        base_url = base_url.rstrip("/")
+        if base_url not in self._users:
+            return
+        self._users[base_url] -= 1
+        if self._users[base_url] > 0:
+            return
+        del self._users[base_url]
+        session = self._sessions.pop(base_url)
+        await session.close()
+        _LOGGER.debug("Closed shared session for %s", base_url)
+
+    async def close(self) -> None:
+        """Close every session."""
+        sessions: List[aiohttp.ClientSession] = list(self._sessions.values())
+        self._sessions.clear()
+        self._users.clear()
+        for session in sessions:
+            await session.close()
+
+
+@callback
+def async_get_session_pool(hass: HomeAssistant) -> SessionPool:
+    """Return the session pool, closed when Home Assistant stops."""
+    pool = hass.data.get(SESSION_POOL)
+    if pool is None:
+        pool = hass.data[SESSION_POOL] = SessionPool()
+
+        async def _async_close(_: Event) -> None:
+            await pool.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return pool
@@ -0,0 +1,167 @@
+"""Compact per-device snapshots of SensorLinx poll results."""
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from .descriptors import get_descriptors
+
+# Payload keys kept as attributes, everything not described is dropped
+METADATA_KEYS = {
+    "syncCode": "sync_code",
+    "name": "name",
+    "deviceType": "device_type",
+    "firmVer": "firmware_version",
+    "connectedAt": "connected_at",
+    "connected": "connected",
+}
+
+
+@lru_cache(maxsize=None)
+def slot_index(device_type: Optional[str]) -> Dict[str, int]:
+    """Return the value slot of each sensor key of a device type."""
+    return {descriptor.key: slot for slot, descriptor in enumerate(get_descriptors(device_type))}
+
+
+def _coerce(value: Any) -> Any:
+    """Return numeric values as float and anything else unchanged."""
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class DeviceSnapshot:
+    """Decoded state of one device from a single poll.
+
+    Sensor values are coerced once and stored in a tuple indexed by the
+    slot of the sensor's descriptor, so entities read them with one index.
+    """
+
+    __slots__ = (
+        "sync_code",
+        "name",
+        "device_type",
+        "firmware_version",
+        "connected_at",
+        "connected",
+        "values",
+        "present",
+    )
+
+    def __init__(
+        self,
+        sync_code: str,
+        name: Optional[str],
+        device_type: Optional[str],
+        firmware_version: Any,
+        connected_at: Optional[str],
+        connected: bool,
+        values: Tuple[Any, ...],
+        present: int,
+    ):
+        """Initialize the snapshot."""
+        self.sync_code = sync_code
+        self.name = name
+        self.device_type = device_type
+        self.firmware_version = firmware_version
+        self.connected_at = connected_at
+        self.connected = connected
+        self.values = values
+        # Bit per slot, set when the payload contained the key
+        self.present = present
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "DeviceSnapshot":
+        """Decode a device payload from the API."""
+        device_type = payload.get("deviceType")
+        values = []
+        present = 0
+        for slot, descriptor in enumerate(get_descriptors(device_type)):
+            if descriptor.key in payload:
+                present |= 1 << slot
+                values.append(_coerce(payload[descriptor.key]))
+            else:
+                values.append(None)
+
+        return cls(
+            payload.get("syncCode"),
+            payload.get("name"),
+            device_type,
+            payload.get("firmVer"),
+            payload.get("connectedAt"),
+            bool(payload.get("connected", False)),
+            tuple(values),
+            present,
+        )
+
+    @property
+    def metadata(self) -> Tuple[Any, ...]:
+        """Return the metadata fields as a tuple for comparisons."""
+        return (
+            self.name,
+            self.device_type,
+            self.firmware_version,
+            self.connected_at,
+            self.connected,
+        )
+
+    def has(self, slot: int) -> bool:
+        """Return True if the payload contained the sensor in slot."""
+        return bool(self.present >> slot & 1)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a value by payload key, like dict.get on the raw payload."""
+        attribute = METADATA_KEYS.get(key)
+        if attribute is not None:
+            return getattr(self, attribute)
+        slot = slot_index(self.device_type).get(key)
+        if slot is None or not self.has(slot):
+            return default
+        return self.values[slot]
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the payload key is known."""
+        if key in METADATA_KEYS:
+            return True
+        slot = slot_index(self.device_type).get(key)
+        return slot is not None and self.has(slot)
+
+    def replace(self, changes: Dict[str, Any]) -> "DeviceSnapshot":
+        """Return a copy with some payload keys set to new values."""
+        slots = slot_index(self.device_type)
+        values = list(self.values)
+        present = self.present
+        metadata = {}
+        for key, value in changes.items():
+            attribute = METADATA_KEYS.get(key)
+            if attribute is not None:
+                metadata[attribute] = value
+                continue
+            slot = slots.get(key)
+            if slot is not None:
+                values[slot] = _coerce(value)
+                present |= 1 << slot
+
+        return DeviceSnapshot(
+            metadata.get("sync_code", self.sync_code),
+            metadata.get("name", self.name),
+            metadata.get("device_type", self.device_type),
+            metadata.get("firmware_version", self.firmware_version),
+            metadata.get("connected_at", self.connected_at),
+            bool(metadata.get("connected", self.connected)),
+            tuple(values),
+            present,
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the snapshot as a device payload."""
+        payload = {key: getattr(self, attribute) for key, attribute in METADATA_KEYS.items()}
+        for slot, descriptor in enumerate(get_descriptors(self.device_type)):
+            if self.has(slot):
+                payload[descriptor.key] = self.values[slot]
+        return payload
+
+    def __repr__(self) -> str:
+        """Return string representation."""
+        return f"DeviceSnapshot(id={self.sync_code}, type={self.device_type}, connected={self.connected})"
@@ -0,0 +1,147 @@
+"""Fault injection tests of the API client against the local simulator."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+
+from benchmarks.simulator import SimulatedAccount, Simulator, start_simulator
+from custom_components.hbx_sensorlinx.api import SensorLinxAPI
+from custom_components.hbx_sensorlinx.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+
+@asynccontextmanager
+async def serve(
+    simulator: Simulator, **kwargs
+) -> AsyncIterator[Tuple[SensorLinxAPI, str]]:
+    """Serve the simulator and yield a client and a device syncCode."""
+    runner, base_url = await start_simulator(simulator)
+    kwargs.setdefault("retry_policy", RetryPolicy(max_retries=3, backoff_base=0.01, backoff_max=0.05))
+    api = SensorLinxAPI("key", base_url, rate_limit=None, **kwargs)
+    try:
+        yield api, simulator.account.sync_codes[0]
+    finally:
+        await api.close()
+        await runner.cleanup()
+
+
+def simulator(**kwargs) -> Simulator:
+    """Return a simulator of a small account."""
+    return Simulator(SimulatedAccount(3, {"THM": 1}), seed=1, **kwargs)
+
+
+def test_retries_server_errors():
+    """Requests failing with 503 now and then succeed on retry."""
+
+    async def run():
+        sim = simulator(error_rate=0.5)
+        async with serve(sim, retry_policy=RetryPolicy(max_retries=8, backoff_base=0.001)) as (api, sync_code):
+            for _ in range(10):
+                assert (await api.get_device_data(sync_code))["syncCode"] == sync_code
+            assert api.metrics.retries > 0
+
+    asyncio.run(run())
+
+
+def test_honors_retry_after():
+    """Throttled requests wait Retry-After before each retry, then give up."""
+
+    async def run():
+        sim = simulator(throttle_rate=1.0, retry_after=0.1)
+        policy = RetryPolicy(max_retries=2, backoff_base=0.0, backoff_max=1.0)
+        async with serve(sim, retry_policy=policy) as (api, sync_code):
+            started = time.monotonic()
+            assert await api.get_device_data(sync_code) is None
+            assert time.monotonic() - started >= 0.2
+            assert sim.total_requests == 3
+            # Throttling is not a server failure
+            assert api.circuit_breaker.state == STATE_CLOSED
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_and_recovers():
+    """Repeated failures open the breaker, a good probe closes it."""
+
+    async def run():
+        sim = simulator(error_rate=1.0)
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.1)
+        async with serve(sim, circuit_breaker=breaker) as (api, sync_code):
+            assert await api.get_device_data(sync_code) is None
+            assert breaker.state == STATE_OPEN
+            served = sim.total_requests
+            assert await api.get_device_data(sync_code) is None
+            assert sim.total_requests == served
+            assert api.metrics.rejected > 0
+
+            sim.error_rate = 0.0
+            await asyncio.sleep(0.1)
+            assert breaker.state == STATE_HALF_OPEN
+            assert await api.get_device_data(sync_code) is not None
+            assert breaker.state == STATE_CLOSED
+
+    asyncio.run(run())
+
+
+def _open_breaker() -> CircuitBreaker:
+    """Return a breaker that just went half open."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_cancelled_probe_releases_breaker():
+    """A half-open probe that is cancelled does not block later requests.
+
+    Shared GETs run on when their caller gives up, writes do not.
+    """
+
+    async def run():
+        sim = simulator(latency=1.0)
+        breaker = _open_breaker()
+        async with serve(sim, circuit_breaker=breaker) as (api, sync_code):
+            probe = asyncio.ensure_future(api.control_device(sync_code, {"heatTarget": 70}))
+            await asyncio.sleep(0.1)
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            assert breaker.allow_request()
+
+    asyncio.run(run())
+
+
+def test_throttled_probe_releases_breaker():
+    """A half-open probe answered with 429 does not block later requests."""
+
+    async def run():
+        sim = simulator(throttle_rate=1.0)
+        breaker = _open_breaker()
+        async with serve(sim, circuit_breaker=breaker, retry_policy=RetryPolicy(max_retries=0)) as (api, sync_code):
+            assert await api.get_device_data(sync_code) is None
+            sim.throttle_rate = 0.0
+            assert await api.get_device_data(sync_code) is not None
+            assert breaker.state == STATE_CLOSED
+
+    asyncio.run(run())
+
+
+def test_malformed_response_keeps_breaker_closed():
+    """Successful responses that fail to decode do not open the breaker."""
+
+    async def run():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        async with serve(simulator(), circuit_breaker=breaker) as (api, sync_code):
+
+            async def malformed(body):
+                raise ValueError("Expecting value")
+
+            api.decoder.decode = malformed
+            assert await api.get_device_data(sync_code) is None
+            assert await api.get_device_data(sync_code) is None
+            assert breaker.state == STATE_CLOSED
+
+    asyncio.run(run())
@@ -0,0 +1,429 @@
+"""Export SensorLinx device history to Parquet, Arrow or CSV files.
+
+Runs outside Home Assistant on top of SensorLinxAPI, needing only aiohttp
+(and pyarrow for Parquet and Arrow output):
+
+    python -m tools.export_history --api-key KEY \\
+        --start 2024-01-01 --output history --format parquet
+
+Every device and window is streamed page by page into its own file, so
+memory stays bounded by the pages in flight and one write batch per job.
+A checkpoint in the output directory records the ranges already written:
+an interrupted export picks up where it stopped, and a later run with the
+same start, or without one, only fetches what is new.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Load the integration's modules without its __init__, which needs Home
+# Assistant; none of the modules used here import it
+PACKAGE = "hbx_sensorlinx"
+if PACKAGE not in sys.modules:
+    sys.modules[PACKAGE] = types.ModuleType(PACKAGE)
+    sys.modules[PACKAGE].__path__ = [
+        str(Path(__file__).resolve().parents[1] / "custom_components" / PACKAGE)
+    ]
+
+from hbx_sensorlinx.api import SensorLinxAPI, history_endpoint  # noqa: E402
+from hbx_sensorlinx.const import (  # noqa: E402
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_URL,
+    EXPORT_BATCH_SIZE,
+    EXPORT_CHECKPOINT_FILE,
+    EXPORT_WINDOW,
+    HISTORY_TIME_KEYS,
+)
+from hbx_sensorlinx.history import record_timestamp, split_windows  # noqa: E402
+from hbx_sensorlinx.scheduler import PRIORITY_BACKGROUND  # noqa: E402
+
+try:  # Parquet and Arrow output need the optional pyarrow package
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# File suffix of each output format
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv.gz"}
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+class ExportError(Exception):
+    """Error to indicate a window could not be exported completely."""
+
+
+class CsvWriter:
+    """Gzip compressed CSV file with the columns of the first batch."""
+
+    def __init__(self, path: Path):
+        """Initialize the writer, the file is created by the first write."""
+        self.path = path
+        self._file = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows, keys missing from the header are dropped."""
+        if self._writer is None:
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+            self._file = gzip.open(self.path, "wt", encoding="utf-8", newline="")
+            self._writer = csv.DictWriter(self._file, columns, extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._file is not None:
+            self._file.close()
+
+
+class ArrowWriter:
+    """Parquet or Arrow IPC file with the schema of the first batch.
+
+    Integer readings are widened to floats, and columns without a value
+    in the first batch are typed as floats, so later batches convert.
+    """
+
+    def __init__(self, path: Path, file_format: str):
+        """Initialize the writer, the file is created by the first write."""
+        self.path = path
+        self.file_format = file_format
+        self._schema = None
+        self._writer = None
+
+    def _make_schema(self, table: "pyarrow.Table") -> "pyarrow.Schema":
+        """Return the schema of the file from the first batch."""
+        fields = []
+        for field in table.schema:
+            if field.name not in HISTORY_TIME_KEYS and (
+                pyarrow.types.is_integer(field.type) or pyarrow.types.is_null(field.type)
+            ):
+                field = field.with_type(pyarrow.float64())
+            fields.append(field)
+        return pyarrow.schema(fields)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """Append rows, keys missing from the schema are dropped."""
+        if self._writer is None:
+            self._schema = self._make_schema(pyarrow.Table.from_pylist(rows))
+            if self.file_format == "parquet":
+                self._writer = pyarrow.parquet.ParquetWriter(
+                    self.path, self._schema, compression="zstd"
+                )
+            else:
+                self._writer = pyarrow.ipc.new_file(
+                    str(self.path),
+                    self._schema,
+                    options=pyarrow.ipc.IpcWriteOptions(compression="zstd"),
+                )
+        self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._writer is not None:
+            self._writer.close()
+
+
+class Checkpoint:
+    """Time ranges already exported, per device.
+
+    Ranges are half-open [start, end) Unix timestamps, merged as they are
+    added. The file is replaced atomically on every save.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize an empty checkpoint."""
+        self.path = path
+        self.ranges: Dict[str, List[List[int]]] = {}
+
+    def load(self) -> None:
+        """Read the checkpoint, if there is one."""
+        if self.path.exists():
+            self.ranges = json.loads(self.path.read_text(encoding="utf-8"))["devices"]
+
+    def save(self) -> None:
+        """Write the checkpoint."""
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps({"version": 1, "devices": self.ranges}), encoding="utf-8")
+        os.replace(temporary, self.path)
+
+    def add(self, sync_code: str, start: int, end: int) -> None:
+        """Record a range as exported."""
+        merged: List[List[int]] = []
+        for range_start, range_end in sorted(self.ranges.get(sync_code, []) + [[start, end]]):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        self.ranges[sync_code] = merged
+
+    def missing(self, sync_code: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Return the parts of [start, end) not exported yet."""
+        missing = []
+        for range_start, range_end in self.ranges.get(sync_code, []):
+            if range_end <= start or range_start >= end:
+                continue
+            if range_start > start:
+                missing.append((start, range_start))
+            start = max(start, range_end)
+        if start < end:
+            missing.append((start, end))
+        return missing
+
+    def latest(self, sync_code: str) -> Optional[int]:
+        """Return the end of the last exported range of a device."""
+        ranges = self.ranges.get(sync_code)
+        return ranges[-1][1] if ranges else None
+
+
+class HistoryExporter:
+    """Export device history window by window.
+
+    Up to jobs windows are exported at once, across devices and windows
+    alike; the API client's scheduler keeps all of them within its rate
+    limit. A window is recorded in the checkpoint once its file is
+    complete. Incomplete windows leave no file and are fetched again by
+    the next run.
+    """
+
+    def __init__(
+        self,
+        api: SensorLinxAPI,
+        output: Path,
+        file_format: str = "parquet",
+        window: int = EXPORT_WINDOW,
+        page_size: int = 1000,
+        page_concurrency: int = 4,
+        jobs: int = 4,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ):
+        """Initialize the exporter."""
+        if file_format in ARROW_FORMATS and pyarrow is None:
+            raise ExportError(f"{file_format} export needs pyarrow, install it or export csv")
+        self.api = api
+        self.output = output
+        self.file_format = file_format
+        self.window = window
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        self.jobs = jobs
+        self.batch_size = batch_size
+        self.checkpoint = Checkpoint(output / EXPORT_CHECKPOINT_FILE)
+        self._checkpoint_lock = asyncio.Lock()
+        self.stats = {"windows": 0, "failed": 0, "records": 0, "files": 0}
+
+    async def async_load(self) -> None:
+        """Create the output directory and read the checkpoint."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.output.mkdir(parents=True, exist_ok=True))
+        await loop.run_in_executor(None, self.checkpoint.load)
+
+    def plan(
+        self, sync_codes: Iterable[str], start: Optional[int], end: int
+    ) -> List[Tuple[str, int, int]]:
+        """Return the (syncCode, start, end) windows still to export.
+
+        Without a start, devices continue from their last exported range
+        and devices never exported are skipped.
+        """
+        windows = []
+        for sync_code in sync_codes:
+            device_start = start if start is not None else self.checkpoint.latest(sync_code)
+            if device_start is None:
+                _LOGGER.warning("Skipping %s, never exported and no start given", sync_code)
+                continue
+            for missing_start, missing_end in self.checkpoint.missing(sync_code, device_start, end):
+                for window in split_windows(missing_start, missing_end, self.window):
+                    windows.append((sync_code, *window))
+        return windows
+
+    async def async_export(self, sync_codes: Iterable[str], start: Optional[int], end: int) -> Dict[str, int]:
+        """Export the history of the devices between start and end."""
+        windows = self.plan(sync_codes, start, end)
+        _LOGGER.info("Exporting %d windows", len(windows))
+        semaphore = asyncio.Semaphore(self.jobs)
+
+        async def export(sync_code: str, window_start: int, window_end: int) -> None:
+            async with semaphore:
+                try:
+                    await self._async_export_window(sync_code, window_start, window_end)
+                except Exception as err:  # pylint: disable=broad-except
+                    self.stats["failed"] += 1
+                    _LOGGER.error(
+                        "Export of %s %s-%s failed: %s", sync_code, window_start, window_end, err
+                    )
+
+        await asyncio.gather(*(export(*window) for window in windows))
+        return self.stats
+
+    def _path(self, sync_code: str, start: int, end: int) -> Path:
+        """Return the file of a window."""
+        return self.output / sync_code / f"{start}-{end}{FORMATS[self.file_format]}"
+
+    def _writer(self, path: Path) -> Any:
+        """Return a writer of the output format."""
+        if self.file_format in ARROW_FORMATS:
+            return ArrowWriter(path, self.file_format)
+        return CsvWriter(path)
+
+    async def _async_export_window(self, sync_code: str, start: int, end: int) -> None:
+        """Stream one window of one device to its file."""
+        loop = asyncio.get_running_loop()
+        path = self._path(sync_code, start, end)
+        partial = path.with_name(path.name + ".partial")
+        writer = None
+        rows: List[Dict[str, Any]] = []
+        received = written = 0
+        total = None
+
+        async def flush() -> None:
+            nonlocal writer, rows, written
+            if writer is None:
+                await loop.run_in_executor(None, lambda: path.parent.mkdir(parents=True, exist_ok=True))
+                writer = self._writer(partial)
+            batch, rows = rows, []
+            await loop.run_in_executor(None, writer.write, batch)
+            written += len(batch)
+
+        try:
+            async for response in self.api.iter_pages(
+                history_endpoint(sync_code, start, end),
+                limit=self.page_size,
+                priority=PRIORITY_BACKGROUND,
+                concurrency=self.page_concurrency,
+            ):
+                if total is None:
+                    total = response.get("totalItems")
+                received += len(response["items"])
+                for record in response["items"]:
+                    # The range is inclusive, keep boundary records in one window
+                    timestamp = record_timestamp(record)
+                    if timestamp is None or start <= timestamp < end:
+                        rows.append(record)
+                if len(rows) >= self.batch_size:
+                    await flush()
+
+            # iter_pages raises on failed pages, this catches short pages
+            if total is not None and received < total:
+                raise ExportError(f"received {received} of {total} records")
+            if rows:
+                await flush()
+        except Exception:
+            if writer is not None:
+                await loop.run_in_executor(None, writer.close)
+                await loop.run_in_executor(None, partial.unlink)
+            raise
+
+        if writer is not None:
+            await loop.run_in_executor(None, writer.close)
+            await loop.run_in_executor(None, os.replace, partial, path)
+            self.stats["files"] += 1
+        self.stats["windows"] += 1
+        self.stats["records"] += written
+        _LOGGER.debug("Exported %d records of %s %s-%s", written, sync_code, start, end)
+
+        async with self._checkpoint_lock:
+            self.checkpoint.add(sync_code, start, end)
+            await loop.run_in_executor(None, self.checkpoint.save)
+
+
+def parse_time(value: str) -> int:
+    """Parse a Unix timestamp or an ISO 8601 date, UTC unless given."""
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+async def _async_main(args: argparse.Namespace) -> int:
+    """Run an export and return the exit code."""
+    api = SensorLinxAPI(
+        args.api_key,
+        args.url,
+        max_concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+    )
+    async with api:
+        exporter = HistoryExporter(
+            api,
+            args.output,
+            args.format,
+            window=int(args.window_days * 86400),
+            page_size=args.page_size,
+            page_concurrency=args.page_concurrency,
+            jobs=args.jobs,
+        )
+        await exporter.async_load()
+
+        sync_codes = args.sync_codes
+        if not sync_codes:
+            devices = await api.get_all_available_devices(limit=api.bulk_page_size)
+            if devices is None:
+                _LOGGER.error("Failed to get available devices")
+                return 1
+            sync_codes = [device["syncCode"] for device in devices]
+
+        started = time.monotonic()
+        stats = await exporter.async_export(sync_codes, args.start, args.end)
+        _LOGGER.info(
+            "Exported %d records to %d files in %.0fs, %d windows failed",
+            stats["records"], stats["files"], time.monotonic() - started, stats["failed"],
+        )
+    return 1 if stats["failed"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the exporter from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-key", default=os.environ.get("SENSORLINX_API_KEY"),
+                        help="defaults to $SENSORLINX_API_KEY")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--sync-codes", nargs="+", help="devices to export, every available one by default")
+    parser.add_argument("--start", type=parse_time,
+                        help="Unix time or ISO date, by default each device continues its last export")
+    parser.add_argument("--end", type=parse_time, help="Unix time or ISO date, now by default")
+    parser.add_argument("--output", type=Path, required=True, help="directory of the files and checkpoint")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet" if pyarrow else "csv")
+    parser.add_argument("--window-days", type=float, default=EXPORT_WINDOW / 86400,
+                        help="days per file, at most 30")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--page-concurrency", type=int, default=4, help="pages fetched at once per window")
+    parser.add_argument("--jobs", type=int, default=4, help="windows exported at once")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT, help="requests per second")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an API key is required, pass --api-key or set SENSORLINX_API_KEY")
+    if not 0 < args.window_days <= 30:
+        parser.error("--window-days must be between 0 and 30")
+    if args.format in ARROW_FORMATS and pyarrow is None:
+        parser.error(f"{args.format} export needs pyarrow, install it or use --format csv")
+    if args.end is None:
+        args.end = int(time.time()) // 60 * 60
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    sys.exit(asyncio.run(_async_main(args)))
+
+
+if __name__ == "__main__":
+    main()